@@ -1,8 +1,15 @@
+import argparse
 import json
+import os
 
-import matplotlib.pyplot as plt
 import numpy as np
 
+from pvi_checkpoint import input_hash, load_checkpoint, save_checkpoint
+from pvi_contacts import ContactForces
+from pvi_diagnostics import DiagnosticsProbe
+from pvi_kernels import make_backend, select_backend
+from pvi_recorder import TrajectoryRecorder
+
 
 def read_json_file(_file):
     with open(_file, "r") as file:
@@ -22,9 +29,9 @@ def read_json_file(_file):
     return number_of_elements, coordinates_x, coordinates_y, connect, forces, restrictions
 
 
-def output_response(_result):
+def output_response(_result, file_name="output_python.json"):
     result = {"resultado": _result.tolist()}
-    with open("output_python.json", "w") as f:
+    with open(file_name, "w") as f:
         json.dump(result, f)
 
 
@@ -42,89 +49,397 @@ def choose_particle_to_follow(forces: np.ndarray, restrictions: np.ndarray, choi
     return 0, 0
 
 
-def main(_file_name):
-    N = 600  # Número de passos na simulação
-    h = 0.00004  # Tamanho do passo na simulação
+def build_bonds(connections: np.ndarray):
+    # Converte a tabela connect em dois vetores planos (partícula j, vizinha k), com índices a partir
+    # de zero, na mesma ordem em que o laço original percorre as conexões
+    neighbours = connections[:, 1:]
+    particles = np.broadcast_to(np.arange(len(connections))[:, None], neighbours.shape)
+    valid = neighbours != 0
+    return particles[valid], neighbours[valid].astype(np.int64) - 1
+
+
+def internal_forces(coordinates_x, coordinates_y, u, bonds, restrictions, raio, kspr):
+    # Calcula as forças internas de todas as ligações de uma vez. Zera em `u` os graus de liberdade
+    # restritos e retorna o vetor de força interna (ndofs, 1).
+    j, k = bonds
+    number_of_elements = len(coordinates_x)
+    ux, uy = u[0::2, 0], u[1::2, 0]
+    fixed_x, fixed_y = restrictions[0::2, 0] == 1, restrictions[1::2, 0] == 1
+
+    # No laço original a restrição de cada partícula só é aplicada quando ela é visitada, então a
+    # ligação de j para uma vizinha restrita k > j ainda vê o deslocamento de k antes de ser zerado
+    already_visited = k < j
+    uj_x = np.where(fixed_x[j], 0.0, ux[j])
+    uj_y = np.where(fixed_y[j], 0.0, uy[j])
+    uk_x = np.where(fixed_x[k] & already_visited, 0.0, ux[k])
+    uk_y = np.where(fixed_y[k] & already_visited, 0.0, uy[k])
+
+    d_x = (coordinates_x[j, 0] + uj_x) - (coordinates_x[k, 0] + uk_x)
+    d_y = (coordinates_y[j, 0] + uj_y) - (coordinates_y[k, 0] + uk_y)
+    di = np.sqrt(d_x * d_x + d_y * d_y)
+    d2 = (di - 2 * raio)
+    dx = d2 * d_x / di
+    dy = d2 * d_y / di
+
+    fi = np.empty((2 * number_of_elements, 1), dtype=np.float64)
+    fi[0::2, 0] = np.bincount(j, weights=kspr * dx, minlength=number_of_elements)
+    fi[1::2, 0] = np.bincount(j, weights=kspr * dy, minlength=number_of_elements)
+
+    ux[fixed_x] = 0.0
+    uy[fixed_y] = 0.0
+    return fi
+
+
+def build_unique_bonds(connections: np.ndarray):
+    # Lista de ligações sem repetição (i < k). Cada ligação aparece no connect a partir das duas
+    # partículas; se alguma aparecer só de um lado, as forças não seriam iguais e opostas.
+    j, k = build_bonds(connections)
+    n = len(connections)
+    if not np.isin(j * n + k, k * n + j).all():
+        raise ValueError("O connect não é simétrico: use o cálculo completo das ligações")
+    first_visit = j < k
+    return j[first_visit], k[first_visit]
+
+
+def internal_forces_loop(coordinates_x, coordinates_y, u, connections, restrictions, raio, kspr):
+    # Versão original do cálculo, partícula a partícula. Mantida como referência para comparar
+    # resultados e tempos com a versão vetorizada.
+    number_of_elements = len(coordinates_x)
+    fi = np.zeros((2 * number_of_elements, 1), dtype=np.float64)  # Reinicialização do vetor de força interna
+    # Cálculo das forças entre as partículas
+    for j in range(number_of_elements):
+        # Aplicação de restrições, se for particula fixa, a variação é zero
+        if restrictions[2 * j] == 1:
+            u[2 * j] = 0.0
+        if restrictions[2 * j + 1] == 1:
+            u[2 * j + 1] = 0.0
+        # Cálculo de posição e força para cada conexão
+        xj = coordinates_x[j] + u[2 * j]
+        yj = coordinates_y[j] + u[2 * j + 1]
+        for index in range(1, len(connections[j])):
+            k = connections[j, index]
+            if k == 0:
+                continue
+            # Calcula a posição atual no eixo x da partícula k
+            xk = coordinates_x[k - 1] + u[2 * k - 2]
+            # Calcula a posição atual no eixo y da partícula k
+            yk = coordinates_y[k - 1] + u[2 * k - 1]
+            # Determina a diferença no eixo x entre as partículas j e k
+            d_x = xj - xk
+            # Determina a diferença no eixo y entre as partículas j e k
+            d_y = yj - yk
+            # Calcula a distância entre as partículas j e k
+            di = np.sqrt(d_x * d_x + d_y * d_y)
+            # Calcula o quanto as partículas estão se sobrepondo ou afastadas, descontando seus diâmetros
+            d2 = (di - 2 * raio)
+            # Ajusta a diferença de posição no eixo x, mantendo a direção da força
+            dx = d2 * d_x / di
+            # Ajusta a diferença de posição no eixo y, mantendo a direção da força
+            dy = d2 * d_y / di
+            # Atualiza a força interna no eixo x para a partícula j
+            fi[2 * j] += kspr * dx
+            # Atualiza a força interna no eixo y para a partícula j
+            fi[2 * j + 1] += kspr * dy
+
+    return fi
+
+
+# Número máximo de partículas de mesmo raio que tocam uma partícula no plano (empacotamento hexagonal)
+CONTACT_COORDINATION = 6
+
+
+def critical_time_step(connections, mass, kspr, contact_stiffness=None):
+    # Maior passo estável do Verlet explícito, h <= 2 / omega_max. Pelo disco de Gershgorin,
+    # omega_max² <= 2 z kspr / mass, onde z é o maior número de ligações de uma partícula, o que dá
+    # h_crit = sqrt(2 mass / (z kspr)). A estimativa é conservadora: o passo crítico real é maior ou igual.
+    # Com `contact_stiffness` cada partícula pode ainda ter até CONTACT_COORDINATION contatos, e z kspr
+    # passa a z kspr + CONTACT_COORDINATION contact_stiffness.
+    coordination = int(np.max((connections[:, 1:] != 0).sum(axis=1), initial=0))
+    stiffness = coordination * kspr
+    if contact_stiffness is not None:
+        stiffness += CONTACT_COORDINATION * contact_stiffness
+    if stiffness == 0:
+        return np.inf
+    return float(np.sqrt(2.0 * mass / stiffness))
+
+
+def choose_time_step(connections, mass, kspr, h=0.00004, N=600, end_time=None, safety_factor=None,
+                     contact_stiffness=None):
+    """Retorna o tamanho e o número de passos da simulação.
+
+    Com `end_time` o passo é o maior estável (passo crítico vezes `safety_factor`, 0.9 se omitido) e o
+    número de passos é o necessário para chegar ao tempo final; o passo é então reduzido um pouco para
+    que N * h seja exatamente `end_time`. Só com `safety_factor` o passo é escolhido da mesma forma e N é
+    mantido. Sem nenhum dos dois valem `h` e `N`. O passo crítico leva em conta os contatos quando
+    `contact_stiffness` é dado.
+    """
+    if end_time is None and safety_factor is None:
+        return h, N
+    if safety_factor is None:
+        safety_factor = 0.9
+    h = safety_factor * critical_time_step(connections, mass, kspr, contact_stiffness)
+    if end_time is not None:
+        N = max(int(np.ceil(end_time / h)), 1)
+        h = end_time / N
+    return h, N
+
+
+def simulate(_file_name, force_kernel="half", backend="auto", workers=None, h=0.00004, N=600, end_time=None,
+             safety_factor=None, trajectory_file=None, trajectory_stride=1, trajectory_particles=None,
+             checkpoint_file=None, checkpoint_every=1000, resume=False, raio=1.0, mass=7850.0,
+             kspr=210000000000.0, contact_stiffness=None, skin=None, diagnostics_file=None,
+             diagnostics_every=20, diagnostics_capacity=10000):
+    """Executa a simulação e retorna o deslocamento da partícula acompanhada em cada passo.
+
+    Com force_kernel="half" o passo de Verlet é feito pelo backend escolhido ("numpy", "numba",
+    "parallel", com `workers` processos, ou "auto", que usa o Numba quando disponível). "vectorized" e
+    "loop" usam os cálculos de referência. O passo de tempo é escolhido por choose_time_step. Com
+    `trajectory_file` as posições e velocidades das partículas (ou de `trajectory_particles`) são gravadas
+    a cada `trajectory_stride` passos por um TrajectoryRecorder. Com `checkpoint_file` o estado do
+    integrador é gravado a cada `checkpoint_every` passos e, com resume=True, a simulação continua do
+    último checkpoint, com resultado idêntico bit a bit ao de uma execução sem interrupção. Com
+    `contact_stiffness` partículas não ligadas que se tocam também interagem (ContactForces, com lista de
+    Verlet de folga `skin`); só no backend numpy. Com `diagnostics_file` uma DiagnosticsProbe registra
+    energias, velocidade máxima, sobreposição máxima e resíduo a cada `diagnostics_every` passos, guardando
+    as últimas `diagnostics_capacity` amostras, e as grava nesse arquivo ao final.
+    """
     # Leitura do arquivo JSON e extração de elementos, coordenadas, conexões, forças e restrições
     number_of_elements, coordinates_x, coordinates_y, connections, forces, restrictions = read_json_file(_file_name)
+    return simulate_model(coordinates_x, coordinates_y, connections, forces, restrictions, force_kernel=force_kernel,
+                          backend=backend, workers=workers, h=h, N=N, end_time=end_time, safety_factor=safety_factor,
+                          trajectory_file=trajectory_file, trajectory_stride=trajectory_stride,
+                          trajectory_particles=trajectory_particles, checkpoint_file=checkpoint_file,
+                          checkpoint_every=checkpoint_every, resume=resume, raio=raio, mass=mass, kspr=kspr,
+                          contact_stiffness=contact_stiffness, skin=skin, diagnostics_file=diagnostics_file,
+                          diagnostics_every=diagnostics_every, diagnostics_capacity=diagnostics_capacity)
+
+
+def simulate_model(coordinates_x, coordinates_y, connections, forces, restrictions, force_kernel="half",
+                   backend="auto", workers=None, half_bonds=None, h=0.00004, N=600, end_time=None,
+                   safety_factor=None, trajectory_file=None, trajectory_stride=1, trajectory_particles=None,
+                   checkpoint_file=None, checkpoint_every=1000, resume=False, raio=1.0, mass=7850.0,
+                   kspr=210000000000.0, contact_stiffness=None, skin=None, diagnostics_file=None,
+                   diagnostics_every=20, diagnostics_capacity=10000):
+    # Simulação a partir dos dados já lidos, no formato retornado por read_json_file. `half_bonds` permite
+    # reaproveitar as ligações de build_unique_bonds quando várias simulações usam a mesma malha.
+    number_of_elements = len(coordinates_x)
     ndofs = 2 * number_of_elements  # Número de graus de liberdade
 
     # Reorganização dos vetores de forças e restrições para o formato correto
     forces = np.reshape(np.transpose(forces), (ndofs, 1))
     restrictions = np.reshape(np.transpose(restrictions), (ndofs, 1))
 
-    raio = 1.0  # Raio das partículas
-    mass = 7850.0  # Massa das partículas
-    kspr = 210000000000.0  # Constante de rigidez da mola
+    # Tamanho (h) e número (N) de passos na simulação
+    h, N = choose_time_step(connections, mass, kspr, h=h, N=N, end_time=end_time, safety_factor=safety_factor,
+                            contact_stiffness=contact_stiffness)
 
-    # Inicialização dos vetores de deslocamento, velocidade e aceleração das partículas
-    u = np.zeros((ndofs, 1), dtype=np.float64)  # Deslocamento
-    v = np.zeros((ndofs, 1), dtype=np.float64)  # Velocidade
-    a = np.zeros((ndofs, 1), dtype=np.float64)  # Aceleração
+    # O estado fica em arrays (n, 2) contíguos, uma linha por partícula com as componentes x e y.
+    # Todos são alocados uma única vez e atualizados no lugar durante a simulação.
+    coordinates = np.hstack((coordinates_x, coordinates_y))
+    external_forces = forces.reshape(number_of_elements, 2)
+    fixed = restrictions.reshape(number_of_elements, 2) == 1  # Graus de liberdade restritos
+    u = np.zeros((number_of_elements, 2), dtype=np.float64)  # Deslocamento
+    v = np.zeros((number_of_elements, 2), dtype=np.float64)  # Velocidade
+    a = np.zeros((number_of_elements, 2), dtype=np.float64)  # Aceleração
+    fi = np.zeros((number_of_elements, 2), dtype=np.float64)  # Vetor de força interna
+    work = np.empty((number_of_elements, 2), dtype=np.float64)
+    # Vista de u no formato (ndofs, 1), com x e y intercalados, usada pelos cálculos de referência
+    u_column = u.reshape(ndofs, 1)
 
     # Vetor para armazenar resultados para plotagem
     res = np.zeros((N, 1), dtype=np.float64)
 
-    fi = np.zeros((ndofs, 1), dtype=np.float64)  # Vetor de força interna
-    a[:] = (forces - fi) / mass  # Cálculo inicial da aceleração
+    # Cálculo inicial da aceleração
+    np.subtract(external_forces, fi, out=a)
+    np.divide(a, mass, out=a)
+
+    # Ligações entre partículas, calculadas uma única vez a partir do connect. Com force_kernel="half"
+    # cada ligação é calculada uma só vez, em vez de uma vez a partir de cada partícula.
+    contacts = None
+    if force_kernel == "half":
+        if half_bonds is None:
+            half_bonds = build_unique_bonds(connections)
+        if contact_stiffness is not None:
+            contacts = ContactForces(coordinates, half_bonds, raio, contact_stiffness, skin)
+        stepper = make_backend(backend, coordinates, half_bonds, external_forces, fixed, raio, mass, kspr, h,
+                               workers=workers, contacts=contacts)
+    elif contact_stiffness is not None:
+        raise ValueError("A detecção de contatos requer force_kernel=\"half\"")
+    else:
+        bonds = build_bonds(connections)
 
     # Escolha de uma partícula específica para acompanhar durante a simulação
     particle_to_follow = choose_particle_to_follow(forces=forces, restrictions=restrictions, choice="with_force")
     # particle_to_follow = choose_particle_to_follow(forces=forces, restrictions=restrictions, choice="fixed")
+
+    # Retomada a partir do último checkpoint. A chave identifica a entrada e os parâmetros que mudam o
+    # resultado, inclusive o cálculo das forças, que muda a ordem das somas.
+    first_step = 0
+    state = {}
+    if checkpoint_file is not None:
+        key = input_hash((coordinates, connections, external_forces, fixed),
+                         dict(h=h, N=N, raio=raio, mass=mass, kspr=kspr, force_kernel=force_kernel,
+                              backend=select_backend(backend, contacts is not None) if force_kernel == "half" else None,
+                              contact_stiffness=contact_stiffness, skin=None if contacts is None else contacts.skin))
+        if resume and os.path.exists(checkpoint_file):
+            first_step, state = load_checkpoint(checkpoint_file, key)
+            u[:], v[:], a[:] = state["u"], state["v"], state["a"]
+            # Checkpoints sem as forças internas as recuperam da aceleração, a = (F - fi) / m
+            fi[:] = state["fi"] if "fi" in state else external_forces - mass * a
+            res[:first_step] = state["res"]
+            # A lista de contatos é reconstruída a partir das mesmas posições de referência, para que a
+            # ordem dos pares, e portanto das somas, seja a mesma da execução interrompida
+            if contacts is not None and "contact_reference" in state:
+                contacts.rebuild(state["contact_reference"])
+
+    # Gravação do campo completo de posições e velocidades ao longo da simulação
+    recorder = None
+    if trajectory_file is not None:
+        recorder = TrajectoryRecorder(trajectory_file, coordinates, N, stride=trajectory_stride,
+                                      particles=trajectory_particles, h=h, resume=first_step > 0)
+        recorder.record(first_step, u, v)
+
+    # Sonda de diagnóstico: energias, velocidade, sobreposição e resíduo a cada `diagnostics_every` passos
+    probe = None
+    if diagnostics_file is not None:
+        # O buffer circular é limitado a `diagnostics_capacity` amostras, e não maior que a simulação inteira
+        probe = DiagnosticsProbe(coordinates, build_unique_bonds(connections) if half_bonds is None else half_bonds,
+                                 external_forces, fixed, raio, mass, kspr, every=diagnostics_every,
+                                 capacity=min(diagnostics_capacity, N // diagnostics_every + 1), h=h,
+                                 contacts=contacts)
+        # Na retomada o histórico vem do checkpoint, que já inclui a amostra do passo retomado
+        if not probe.restore(state):
+            probe.record(first_step, u, v, fi)
+
     # Loop principal da simulação
-    for i in range(N):
-        v += a * (0.5 * h)  # Atualização da velocidade
-        u += v * h  # Atualização do deslocamento
-
-        fi = [0.0] * len(fi)  # Reinicialização do vetor de força interna
-        # Cálculo das forças entre as partículas
-        for j in range(number_of_elements):
-            # Aplicação de restrições, se for particula fixa, a variação é zero
-            if restrictions[2 * j] == 1:
-                u[2 * j] = 0.0
-            if restrictions[2 * j + 1] == 1:
-                u[2 * j + 1] = 0.0
-            # Cálculo de posição e força para cada conexão
-            xj = coordinates_x[j] + u[2 * j]
-            yj = coordinates_y[j] + u[2 * j + 1]
-            for index in range(1, len(connections[j])):
-                k = connections[j, index]
-                if k == 0:
-                    continue
-                # Calcula a posição atual no eixo x da partícula k
-                xk = coordinates_x[k - 1] + u[2 * k - 2]
-                # Calcula a posição atual no eixo y da partícula k
-                yk = coordinates_y[k - 1] + u[2 * k - 1]
-                # Determina a diferença no eixo x entre as partículas j e k
-                d_x = xj - xk
-                # Determina a diferença no eixo y entre as partículas j e k
-                d_y = yj - yk
-                # Calcula a distância entre as partículas j e k
-                di = np.sqrt(d_x * d_x + d_y * d_y)
-                # Calcula o quanto as partículas estão se sobrepondo ou afastadas, descontando seus diâmetros
-                d2 = (di - 2 * raio)
-                # Ajusta a diferença de posição no eixo x, mantendo a direção da força
-                dx = d2 * d_x / di
-                # Ajusta a diferença de posição no eixo y, mantendo a direção da força
-                dy = d2 * d_y / di
-                # Atualiza a força interna no eixo x para a partícula j
-                fi[2 * j] += kspr * dx
-                # Atualiza a força interna no eixo y para a partícula j
-                fi[2 * j + 1] += kspr * dy
-
-        # Atualização da aceleração
-        a = (forces - fi) / mass
-        # Atualização da velocidade
-        v += a * (0.5 * h)
-        # Armazenamento do deslocamento da partícula específica para plotagem
-        res[i] = u[particle_to_follow]
-
-    # Salva os resultados em um arquivo JSON
-    output_response(res.flatten())
-    x = np.arange(1, N + 1)
+    try:
+        for i in range(first_step, N):
+            if force_kernel == "half":
+                stepper.step(u, v, a, fi)
+            else:
+                # Atualização da velocidade
+                np.multiply(a, 0.5 * h, out=work)
+                v += work
+                # Atualização do deslocamento
+                np.multiply(v, h, out=work)
+                u += work
+
+                # Cálculo das forças entre as partículas, com aplicação das restrições
+                if force_kernel == "loop":
+                    fi[:] = internal_forces_loop(coordinates_x, coordinates_y, u_column, connections, restrictions,
+                                                 raio, kspr).reshape(number_of_elements, 2)
+                else:
+                    fi[:] = internal_forces(coordinates_x, coordinates_y, u_column, bonds, restrictions, raio,
+                                            kspr).reshape(number_of_elements, 2)
+
+                # Atualização da aceleração
+                np.subtract(external_forces, fi, out=a)
+                np.divide(a, mass, out=a)
+                # Atualização da velocidade
+                np.multiply(a, 0.5 * h, out=work)
+                v += work
+            # Armazenamento do deslocamento da partícula específica para plotagem
+            res[i] = u_column[particle_to_follow]
+            if recorder is not None:
+                recorder.record(i + 1, u, v)
+            if probe is not None:
+                probe.record(i + 1, u, v, fi)
+            if checkpoint_file is not None and ((i + 1) % checkpoint_every == 0 or i + 1 == N):
+                extra = {} if contacts is None or contacts.reference is None else \
+                    {"contact_reference": contacts.reference}
+                if probe is not None:
+                    extra.update(probe.state())
+                save_checkpoint(checkpoint_file, i + 1, key, u=u, v=v, a=a, fi=fi, res=res[:i + 1], **extra)
+                # A trajetória fica legível até o passo do checkpoint, mesmo que a execução seja morta depois
+                if recorder is not None:
+                    recorder.flush()
+    finally:
+        if force_kernel == "half":
+            stepper.close()
+        if recorder is not None:
+            recorder.close()
+        if probe is not None:
+            probe.export(diagnostics_file)
+
+    return res
+
+
+def plot_response(res):
+    # O matplotlib só é importado quando a plotagem é pedida, para que execuções em lote não dependam dele
+    import matplotlib.pyplot as plt
+
+    x = np.arange(1, len(res) + 1)
     # Plotagem das variações de posição da partícula escolhida ao longo do tempo
     plt.plot(x, res)
     plt.show()
 
+
+def main(_file_name, output_file="output_python.json", plot=False, **options):
+    # `options` são repassadas para simulate (backend, h, N, mass, kspr, raio, trajetória, checkpoint...)
+    res = simulate(_file_name, **options)
+
+    # Salva os resultados em um arquivo JSON. Com a trajetória completa gravada em arquivo, o JSON da
+    # partícula acompanhada não é gerado.
+    if options.get("trajectory_file") is None:
+        output_response(res.flatten(), output_file)
+    if plot:
+        plot_response(res)
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Simulação de partículas ligadas por molas (DEM) com Verlet.")
+    parser.add_argument("input", nargs="?", default="pvi2.json", help="arquivo de entrada (padrão: pvi2.json)")
+    parser.add_argument("-o", "--output", default="output_python.json",
+                        help="arquivo JSON com o deslocamento da partícula acompanhada")
+    parser.add_argument("--kernel", choices=("half", "vectorized", "loop"), default="half",
+                        help="cálculo das forças internas")
+    parser.add_argument("--backend", choices=("auto", "numpy", "numba", "parallel"), default="auto",
+                        help="backend do passo de Verlet com --kernel half")
+    parser.add_argument("--workers", type=int, default=None, help="número de processos do backend parallel")
+    parser.add_argument("-N", "--steps", type=int, default=600, help="número de passos")
+    parser.add_argument("--h", type=float, default=0.00004, help="tamanho do passo")
+    parser.add_argument("--end-time", type=float, default=None,
+                        help="tempo final; o passo passa a ser o maior estável e N é calculado")
+    parser.add_argument("--safety-factor", type=float, default=None,
+                        help="fração do passo crítico estimado usada como passo")
+    parser.add_argument("--mass", type=float, default=7850.0, help="massa das partículas")
+    parser.add_argument("--kspr", type=float, default=210000000000.0, help="rigidez das molas")
+    parser.add_argument("--radius", type=float, default=1.0, help="raio das partículas")
+    parser.add_argument("--contacts", action="store_true",
+                        help="detecta contatos entre partículas não ligadas (backend numpy)")
+    parser.add_argument("--contact-stiffness", type=float, default=None,
+                        help="rigidez dos contatos (padrão: a mesma das molas)")
+    parser.add_argument("--skin", type=float, default=None,
+                        help="folga da lista de Verlet dos contatos (padrão: o raio)")
+    parser.add_argument("--trajectory", default=None,
+                        help="arquivo .npy para gravar posições e velocidades de todas as partículas")
+    parser.add_argument("--trajectory-stride", type=int, default=1, help="passos entre quadros da trajetória")
+    parser.add_argument("--diagnostics", default=None,
+                        help="arquivo (.json, .csv ou .npz) com energias, velocidades, sobreposição e resíduo")
+    parser.add_argument("--diagnostics-every", type=int, default=20, help="passos entre amostras do diagnóstico")
+    parser.add_argument("--diagnostics-capacity", type=int, default=10000,
+                        help="amostras guardadas no buffer circular do diagnóstico (as mais antigas são descartadas)")
+    parser.add_argument("--checkpoint", default=None, help="arquivo de checkpoint do estado do integrador")
+    parser.add_argument("--checkpoint-every", type=int, default=1000, help="passos entre checkpoints")
+    parser.add_argument("--resume", action="store_true",
+                        help="continua do checkpoint (checkpoint_pvi.npz se --checkpoint for omitido)")
+    parser.add_argument("--plot", action="store_true", help="mostra o gráfico do deslocamento ao final")
+    return parser.parse_args(argv)
+
+
 if __name__ == '__main__':
-    main("pvi2.json")
\ No newline at end of file
+    arguments = parse_arguments()
+    checkpoint_file = arguments.checkpoint
+    if arguments.resume and checkpoint_file is None:
+        checkpoint_file = "checkpoint_pvi.npz"
+    contact_stiffness = None
+    if arguments.contacts or arguments.contact_stiffness is not None:
+        contact_stiffness = arguments.kspr if arguments.contact_stiffness is None else arguments.contact_stiffness
+    main(arguments.input, output_file=arguments.output, plot=arguments.plot, force_kernel=arguments.kernel,
+         backend=arguments.backend, workers=arguments.workers, h=arguments.h, N=arguments.steps,
+         end_time=arguments.end_time, safety_factor=arguments.safety_factor, mass=arguments.mass,
+         kspr=arguments.kspr, raio=arguments.radius, trajectory_file=arguments.trajectory,
+         trajectory_stride=arguments.trajectory_stride, checkpoint_file=checkpoint_file,
+         checkpoint_every=arguments.checkpoint_every, resume=arguments.resume, contact_stiffness=contact_stiffness,
+         skin=arguments.skin, diagnostics_file=arguments.diagnostics, diagnostics_every=arguments.diagnostics_every,
+         diagnostics_capacity=arguments.diagnostics_capacity)
@@ -0,0 +1,80 @@
+import sys
+import time
+
+import numpy as np
+
+from pvi import build_unique_bonds
+from pvi_kernels import make_backend
+
+
+def build_particle_grid(rows, columns, raio=1.0, force=1000.0):
+    # Gera uma malha retangular de partículas no mesmo formato dos arquivos pvi.json: partículas
+    # numeradas por coluna e espaçadas de um diâmetro, conexões [n_vizinhos, vizinhos...] com índices a
+    # partir de 1, a primeira coluna engastada e uma força horizontal na última.
+    index = np.zeros((rows + 2, columns + 2), dtype=np.int64)
+    index[1:-1, 1:-1] = np.arange(1, rows * columns + 1).reshape(columns, rows).T
+
+    neighbours = np.stack((index[:-2, 1:-1], index[2:, 1:-1], index[1:-1, :-2], index[1:-1, 2:]), axis=-1)
+    neighbours = neighbours.reshape(-1, 4)[np.argsort(index[1:-1, 1:-1].ravel())]
+    # Os vizinhos de cada partícula (abaixo, acima, à esquerda, à direita) ficam no início da linha,
+    # seguidos de zeros, como no arquivo exportado
+    neighbours = np.take_along_axis(neighbours, np.argsort(neighbours == 0, axis=1, kind="stable"), axis=1)
+    connect = np.column_stack(((neighbours != 0).sum(axis=1), neighbours))
+
+    column, row = np.divmod(np.arange(rows * columns), rows)
+    coordinates = np.column_stack((2 * raio * column + raio, 2 * raio * row + raio))
+    restrictions = np.zeros((rows * columns, 2), dtype=np.int64)
+    restrictions[column == 0] = 1
+    forces = np.zeros((rows * columns, 2))
+    forces[column == columns - 1, 0] = force
+
+    return {"coordinates": coordinates.tolist(), "connect": connect.tolist(),
+            "restrictions": restrictions.tolist(), "forces": forces.tolist()}
+
+
+def _backend_inputs(data, raio=1.0, mass=7850.0, kspr=210000000000.0, h=0.00004):
+    coordinates = np.array(data["coordinates"], dtype=np.float64)
+    half_bonds = build_unique_bonds(np.array(data["connect"], dtype=np.int64))
+    external_forces = np.array(data["forces"], dtype=np.float64)
+    fixed = np.array(data["restrictions"]) == 1
+    return coordinates, half_bonds, external_forces, fixed, raio, mass, kspr, h
+
+
+def compare_worker_scaling(particles=200_000, workers=(1, 2, 4, 8), steps=50):
+    # Mede o tempo por passo do backend paralelo com diferentes números de processos, tendo o backend
+    # NumPy serial como referência, e confere que o deslocamento final é o mesmo
+    side = int(round(np.sqrt(particles)))
+    inputs = _backend_inputs(build_particle_grid(side, side))
+    number_of_elements = len(inputs[0])
+
+    def run(name, **options):
+        backend = make_backend(name, *inputs, **options)
+        u, v, a, fi = (np.zeros((number_of_elements, 2)) for _ in range(4))
+        try:
+            backend.step(u, v, a, fi)  # Primeiro passo fora da medição
+            start = time.perf_counter()
+            for _ in range(steps):
+                backend.step(u, v, a, fi)
+            return (time.perf_counter() - start) / steps, u
+        finally:
+            backend.close()
+
+    serial_time, reference = run("numpy")
+    scale = np.max(np.abs(reference))
+    print(f"{number_of_elements} partículas, {steps} passos")
+    print(f"{'processos':>10} {'ms/passo':>10} {'ganho':>8} {'diferença':>10}")
+    print(f"{'serial':>10} {1000 * serial_time:>10.2f} {1.0:>7.2f}x {0.0:>10.1e}")
+    for count in workers:
+        step_time, u = run("parallel", workers=count)
+        difference = np.max(np.abs(u - reference)) / scale
+        print(f"{count:>10} {1000 * step_time:>10.2f} {serial_time / step_time:>7.2f}x {difference:>10.1e}")
+
+
+if __name__ == '__main__':
+    # Uso: python pvi_benchmark.py [partículas] [passos]
+    if len(sys.argv) > 2:
+        compare_worker_scaling(int(sys.argv[1]), steps=int(sys.argv[2]))
+    elif len(sys.argv) > 1:
+        compare_worker_scaling(int(sys.argv[1]))
+    else:
+        compare_worker_scaling()
@@ -0,0 +1,39 @@
+import hashlib
+import os
+
+import numpy as np
+
+
+def input_hash(arrays, parameters):
+    # Identifica a simulação pelos dados de entrada e parâmetros: um checkpoint só pode ser retomado pela
+    # mesma simulação que o gravou
+    digest = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(str((array.dtype.str, array.shape)).encode())
+        digest.update(array.tobytes())
+    digest.update(repr(sorted(parameters.items())).encode())
+    return digest.hexdigest()
+
+
+def save_checkpoint(file_name, step, input_key, **arrays):
+    """Grava o estado do integrador num arquivo .npz de forma atômica.
+
+    O arquivo é escrito primeiro com outro nome e depois renomeado por cima do anterior, então uma
+    interrupção durante a gravação nunca deixa um checkpoint incompleto: fica valendo o último completo.
+    """
+    temporary = file_name + ".tmp"
+    with open(temporary, "wb") as f:
+        np.savez(f, step=np.int64(step), input_hash=np.array(input_key), **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, file_name)
+
+
+def load_checkpoint(file_name, input_key):
+    # Retorna o passo e os arrays gravados; recusa checkpoints de outra entrada ou de outros parâmetros
+    with np.load(file_name) as data:
+        if str(data["input_hash"]) != input_key:
+            raise ValueError(f"O checkpoint {file_name} foi gravado para outra entrada ou outros parâmetros")
+        arrays = {name: data[name] for name in data.files if name not in ("step", "input_hash")}
+        return int(data["step"]), arrays
@@ -0,0 +1,101 @@
+import numpy as np
+
+# Metade da vizinhança 3x3 de uma célula: cada par de células vizinhas é visitado uma única vez
+HALF_STENCIL = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+
+def find_pairs(positions, cutoff):
+    """Retorna os pares (i, k), i != k, de partículas a menos de `cutoff` uma da outra.
+
+    Usa uma lista de células uniforme (hash espacial) com células de lado `cutoff`: cada partícula só é
+    comparada com as partículas da sua célula e das células vizinhas, o que custa O(n) em vez dos O(n²)
+    da comparação de todos os pares. Cada par aparece uma única vez.
+    """
+    n = len(positions)
+    cells = np.floor((positions - positions.min(axis=0)) / cutoff).astype(np.int64)
+    # Com uma linha a mais de folga, as chaves das células vizinhas de cima e de baixo nunca coincidem com
+    # as de outra coluna ocupada
+    height = int(cells[:, 1].max(initial=0)) + 2
+    keys = cells[:, 0] * height + cells[:, 1]
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    pairs_i, pairs_k = [], []
+    for dx, dy in HALF_STENCIL:
+        neighbour_keys = keys + dx * height + dy
+        start = np.searchsorted(sorted_keys, neighbour_keys, side="left")
+        counts = np.searchsorted(sorted_keys, neighbour_keys, side="right") - start
+
+        # Expande, para cada partícula i, todas as partículas k da célula vizinha
+        i = np.repeat(np.arange(n), counts)
+        offsets = np.arange(len(i)) - np.repeat(np.cumsum(counts) - counts, counts)
+        k = order[np.repeat(start, counts) + offsets]
+        if (dx, dy) == (0, 0):
+            same_cell = i < k
+            i, k = i[same_cell], k[same_cell]
+        pairs_i.append(i)
+        pairs_k.append(k)
+
+    i, k = np.concatenate(pairs_i), np.concatenate(pairs_k)
+    d = positions[i] - positions[k]
+    close = np.sum(d * d, axis=1) < cutoff * cutoff
+    return i[close], k[close]
+
+
+class ContactForces:
+    """Forças de contato entre partículas não ligadas, com lista de Verlet.
+
+    Os pares candidatos são as partículas a menos de 2 raio + `skin` umas das outras, encontradas por
+    find_pairs. A lista só é reconstruída quando alguma partícula se deslocou mais de skin / 2 desde a
+    última construção: até lá, nenhum par fora da lista pode ter entrado em contato. Pares já ligados no
+    connect são excluídos, pois a mola da ligação já atua entre eles. A força de contato é a mesma da
+    mola, kn (di - 2 raio) d / di, mas só de compressão (di < 2 raio).
+    """
+
+    def __init__(self, coordinates, half_bonds, raio, kn, skin=None):
+        self.coordinates = coordinates
+        self.raio = raio
+        self.kn = kn
+        self.skin = raio if skin is None else skin
+        self.rebuilds = 0
+
+        number_of_elements = len(coordinates)
+        i, k = half_bonds
+        self._bond_keys = np.unique(np.minimum(i, k) * number_of_elements + np.maximum(i, k))
+        self.reference = None
+        self.i = self.k = np.empty(0, dtype=np.int64)
+
+    def rebuild(self, positions):
+        i, k = find_pairs(positions, 2 * self.raio + self.skin)
+        number_of_elements = len(positions)
+        keys = np.minimum(i, k) * number_of_elements + np.maximum(i, k)
+        not_bonded = ~np.isin(keys, self._bond_keys, assume_unique=False)
+        self.i, self.k = i[not_bonded], k[not_bonded]
+        self.reference = positions.copy()
+        self.rebuilds += 1
+
+    def add(self, u, out):
+        # Soma em `out` as forças de contato para o deslocamento `u`
+        positions = self.coordinates + u
+        if self.reference is None:
+            self.rebuild(positions)
+        else:
+            moved = positions - self.reference
+            if np.max(np.sum(moved * moved, axis=1)) > (0.5 * self.skin) ** 2:
+                self.rebuild(positions)
+
+        if len(self.i) == 0:
+            return out
+        d = positions[self.i] - positions[self.k]
+        di = np.sqrt(np.sum(d * d, axis=1))
+        overlap = di < 2 * self.raio
+        if not overlap.any():
+            return out
+        i, k, d, di = self.i[overlap], self.k[overlap], d[overlap], di[overlap]
+        force = self.kn * ((di - 2 * self.raio) / di)[:, None] * d
+
+        number_of_elements = len(out)
+        for axis in range(2):
+            out[:, axis] += np.bincount(i, weights=force[:, axis], minlength=number_of_elements)
+            out[:, axis] -= np.bincount(k, weights=force[:, axis], minlength=number_of_elements)
+        return out
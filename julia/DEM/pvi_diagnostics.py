@@ -0,0 +1,157 @@
+import json
+import sys
+import time
+
+import numpy as np
+
+# Grandezas registradas em cada amostra, na ordem das colunas do buffer
+QUANTITIES = ("step", "time", "kinetic_energy", "potential_energy", "max_velocity", "max_overlap", "residual_norm")
+
+
+class DiagnosticsProbe:
+    """Registra grandezas globais da simulação a cada `every` passos num buffer circular pré-alocado.
+
+    Em cada amostra calcula, de forma vetorizada: a energia cinética 1/2 m |v|², a energia potencial das
+    molas 1/2 kspr (L - 2 raio)², a maior velocidade, a maior sobreposição 2 raio - L entre partículas
+    ligadas ou em contato (`contacts`, um ContactForces) e a norma da força residual F - fi. Os graus de
+    liberdade restritos não entram na energia cinética, na velocidade nem no resíduo. O buffer guarda as
+    últimas `capacity` amostras; as mais antigas são sobrescritas. Os passos fora da amostragem custam só
+    uma comparação, e sem `diagnostics_file` em simulate a sonda nem é criada.
+    """
+
+    def __init__(self, coordinates, half_bonds, external_forces, fixed, raio, mass, kspr, every=20,
+                 capacity=10000, h=None, contacts=None):
+        self.i, self.k = half_bonds
+        self.external_forces = external_forces
+        self.raio = raio
+        self.mass = mass
+        self.kspr = kspr
+        self.every = every
+        self.h = h
+        self.contacts = contacts
+        self.count = 0  # Total de amostras registradas, inclusive as já sobrescritas
+
+        self._coordinates = coordinates
+        self._coordinates_i = coordinates[self.i]
+        self._coordinates_k = coordinates[self.k]
+        self._free = (~fixed).astype(np.float64)
+        self._buffer = np.zeros((capacity, len(QUANTITIES)), dtype=np.float64)
+
+        number_of_bonds = len(self.i)
+        self._d = np.empty((number_of_bonds, 2), dtype=np.float64)
+        self._work = np.empty((number_of_bonds, 2), dtype=np.float64)
+        self._stretch = np.empty(number_of_bonds, dtype=np.float64)
+        self._state = np.empty_like(coordinates)
+        self._speed2 = np.empty(len(coordinates), dtype=np.float64)
+
+    @property
+    def capacity(self):
+        return len(self._buffer)
+
+    def _bond_stretch(self, u):
+        # Alongamento L - 2 raio de cada ligação, com os mesmos buffers a cada amostra
+        np.take(u, self.i, axis=0, out=self._d)
+        np.add(self._coordinates_i, self._d, out=self._d)
+        np.take(u, self.k, axis=0, out=self._work)
+        np.add(self._coordinates_k, self._work, out=self._work)
+        np.subtract(self._d, self._work, out=self._d)
+        np.multiply(self._d, self._d, out=self._work)
+        np.add(self._work[:, 0], self._work[:, 1], out=self._stretch)
+        np.sqrt(self._stretch, out=self._stretch)
+        np.subtract(self._stretch, 2 * self.raio, out=self._stretch)
+        return self._stretch
+
+    def _contact_overlap(self, u):
+        # Maior sobreposição entre os pares da lista de Verlet dos contatos
+        contacts = self.contacts
+        if contacts is None or len(contacts.i) == 0:
+            return 0.0
+        positions = self._coordinates + u
+        d = positions[contacts.i] - positions[contacts.k]
+        return max(2 * self.raio - np.sqrt(np.min(np.sum(d * d, axis=1))), 0.0)
+
+    def record(self, step, u, v, fi):
+        if step % self.every != 0:
+            return
+        sample = self._buffer[self.count % self.capacity]
+
+        stretch = self._bond_stretch(u)
+        potential_energy = 0.5 * self.kspr * np.dot(stretch, stretch)
+        max_overlap = max(0.0, -stretch.min(initial=0.0), self._contact_overlap(u))
+
+        np.multiply(v, v, out=self._state)
+        np.multiply(self._state, self._free, out=self._state)
+        speed2 = np.add(self._state[:, 0], self._state[:, 1], out=self._speed2)
+        kinetic_energy = 0.5 * self.mass * speed2.sum()
+        max_velocity = np.sqrt(speed2.max(initial=0.0))
+
+        np.subtract(self.external_forces, fi, out=self._state)
+        np.multiply(self._state, self._free, out=self._state)
+        residual_norm = np.sqrt(np.vdot(self._state, self._state))
+
+        sample[:] = (step, np.nan if self.h is None else step * self.h, kinetic_energy, potential_energy,
+                     max_velocity, max_overlap, residual_norm)
+        self.count += 1
+
+    def state(self):
+        # Buffer e contador, gravados no checkpoint para que uma simulação retomada exporte todo o histórico
+        return {"diagnostics_buffer": self._buffer, "diagnostics_count": np.int64(self.count),
+                "diagnostics_every": np.int64(self.every)}
+
+    def restore(self, state):
+        # Recupera o histórico de state(); retorna False se o checkpoint não tem sonda ou foi gravado com
+        # outra amostragem, caso em que o histórico recomeça
+        if "diagnostics_buffer" not in state or int(state["diagnostics_every"]) != self.every \
+                or state["diagnostics_buffer"].shape != self._buffer.shape:
+            return False
+        self._buffer[:] = state["diagnostics_buffer"]
+        self.count = int(state["diagnostics_count"])
+        return True
+
+    def samples(self):
+        # Amostras guardadas no buffer, em ordem cronológica, com uma coluna por grandeza de QUANTITIES
+        if self.count <= self.capacity:
+            return self._buffer[:self.count].copy()
+        start = self.count % self.capacity
+        return np.concatenate((self._buffer[start:], self._buffer[:start]))
+
+    def as_dict(self):
+        samples = self.samples()
+        return {name: samples[:, column] for column, name in enumerate(QUANTITIES)}
+
+    def export(self, file_name):
+        # Grava as amostras em .npz (um array por grandeza), .csv ou, para qualquer outra extensão, JSON
+        columns = self.as_dict()
+        if file_name.endswith(".npz"):
+            np.savez(file_name, **columns)
+        elif file_name.endswith(".csv"):
+            np.savetxt(file_name, self.samples(), delimiter=",", header=",".join(QUANTITIES), comments="")
+        else:
+            with open(file_name, "w") as f:
+                json.dump({name: values.tolist() for name, values in columns.items()}, f)
+
+
+def measure_overhead(_file_name="pvi2.json", every=20, N=20000, backend="numpy",
+                     diagnostics_file="diagnostics_pvi.json"):
+    # Compara o tempo da simulação com e sem a sonda de diagnóstico
+    from pvi import simulate
+
+    simulate(_file_name, backend=backend, N=10)  # Compilação do Numba e aquecimento fora da medição
+    start = time.perf_counter()
+    simulate(_file_name, backend=backend, N=N)
+    plain = time.perf_counter() - start
+
+    start = time.perf_counter()
+    simulate(_file_name, backend=backend, N=N, diagnostics_file=diagnostics_file, diagnostics_every=every)
+    probed = time.perf_counter() - start
+
+    print(f"sem sonda: {plain:.3f} s  com sonda (a cada {every} passos): {probed:.3f} s  "
+          f"acréscimo: {100 * (probed / plain - 1):.1f}%")
+    return plain, probed
+
+
+if __name__ == '__main__':
+    # Uso: python pvi_diagnostics.py [arquivo.json] [passos entre amostras]
+    file_name = sys.argv[1] if len(sys.argv) > 1 else "pvi2.json"
+    every = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    measure_overhead(file_name, every=every)
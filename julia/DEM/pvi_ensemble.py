@@ -0,0 +1,123 @@
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from pvi import build_unique_bonds, choose_particle_to_follow, choose_time_step, read_json_file, simulate_model
+
+# Parâmetros de simulate_model que podem ser dados para todo o conjunto ou em cada caso de carga
+SIMULATION_OPTIONS = ("h", "N", "end_time", "safety_factor", "raio", "mass", "kspr", "force_kernel",
+                      "contact_stiffness", "skin")
+
+# Dados da malha base, carregados uma única vez em cada processo pelo inicializador do pool
+_base = None
+
+
+def read_load_cases(_file):
+    # Formato: {"cases": [{"name": ..., "forces": [[fx, fy], ...], "restrictions": [[rx, ry], ...],
+    #                      "force_scale": 2.0, "force_angle": 90.0, "end_time": 0.05, "mass": 7850.0}, ...]}
+    # Todos os campos além do nome são opcionais: os primeiros alteram as forças e restrições do arquivo
+    # base e os de SIMULATION_OPTIONS substituem, só nesse caso, os parâmetros da simulação.
+    with open(_file, "r") as file:
+        return json.load(file)["cases"]
+
+
+def apply_load_case(forces, restrictions, case):
+    # Retorna as forças e restrições do caso no formato de read_json_file, uma componente por linha
+    if "forces" in case:
+        forces = np.array(case["forces"], dtype=np.float64).reshape(-1, 1)
+    if "restrictions" in case:
+        restrictions = np.array(case["restrictions"]).reshape(-1, 1)
+
+    # Gira as forças de cada partícula pelo ângulo dado, em graus, e multiplica pelo fator de escala
+    angle = np.radians(case.get("force_angle", 0.0))
+    rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+    forces = case.get("force_scale", 1.0) * (forces.reshape(-1, 2) @ rotation.T)
+    return forces.reshape(-1, 1), restrictions
+
+
+def _load_base(_file_name):
+    global _base
+    number_of_elements, coordinates_x, coordinates_y, connections, forces, restrictions = read_json_file(_file_name)
+    _base = (coordinates_x, coordinates_y, connections, forces, restrictions, build_unique_bonds(connections))
+
+
+def case_options(case, options):
+    # Parâmetros da simulação de um caso: os do conjunto, substituídos pelos que o próprio caso define
+    return {**options, **{name: case[name] for name in SIMULATION_OPTIONS if name in case}}
+
+
+def _run_case(case, options):
+    coordinates_x, coordinates_y, connections, forces, restrictions, half_bonds = _base
+    forces, restrictions = apply_load_case(forces, restrictions, case)
+    particle = choose_particle_to_follow(forces=forces, restrictions=restrictions, choice="with_force")
+    options = case_options(case, options)
+    response = simulate_model(coordinates_x, coordinates_y, connections, forces, restrictions, backend="numpy",
+                              half_bonds=half_bonds, **options)
+    # Passo efetivamente usado, que com end_time ou safety_factor é calculado a partir da malha
+    h, N = choose_time_step(connections, options.get("mass", 7850.0), options.get("kspr", 210000000000.0),
+                            h=options.get("h", 0.00004), N=options.get("N", 600), end_time=options.get("end_time"),
+                            safety_factor=options.get("safety_factor"),
+                            contact_stiffness=options.get("contact_stiffness"))
+    return case["name"], particle, h, response.ravel()
+
+
+def run_ensemble(base_file, cases, workers=None, output_file="ensemble_pvi.npz", **options):
+    """Executa todos os casos de carga sobre a malha do arquivo base num pool de processos.
+
+    Cada processo lê a malha e monta as ligações uma única vez. `options` são parâmetros de simulate_model
+    (SIMULATION_OPTIONS: h, N, end_time, safety_factor, mass, kspr, raio...) aplicados a todos os casos,
+    e cada caso pode substituí-los. As respostas da partícula acompanhada são gravadas juntas em
+    `output_file`: nomes, grau de liberdade acompanhado, passo de tempo e uma linha por caso; casos com
+    menos passos são completados com NaN.
+    """
+    unknown = set(options) - set(SIMULATION_OPTIONS)
+    if unknown:
+        raise ValueError(f"Parâmetros de simulação desconhecidos: {', '.join(sorted(unknown))}")
+    with ProcessPoolExecutor(max_workers=workers, initializer=_load_base, initargs=(base_file,)) as pool:
+        results = list(pool.map(partial(_run_case, options=options), cases))
+
+    names = np.array([name for name, particle, h, response in results])
+    # Sem forças aplicadas choose_particle_to_follow retorna (0, 0); o grau de liberdade é o 0
+    particles = np.array([particle if np.isscalar(particle) else 0 for name, particle, h, response in results])
+    time_steps = np.array([h for name, particle, h, response in results])
+    responses = np.full((len(results), max(len(response) for *_, response in results)), np.nan)
+    for row, (name, particle, h, response) in enumerate(results):
+        responses[row, :len(response)] = response
+    np.savez_compressed(output_file, names=names, particles=particles, time_steps=time_steps, responses=responses)
+    return names, particles, responses
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Executa vários casos de carga sobre a mesma malha de partículas.")
+    parser.add_argument("base", help="arquivo da malha base, no formato de pvi.json")
+    parser.add_argument("cases", help="arquivo JSON com os casos de carga")
+    parser.add_argument("--workers", type=int, default=None, help="número de processos")
+    parser.add_argument("-o", "--output", default="ensemble_pvi.npz", help="arquivo .npz com as respostas")
+    # Parâmetros da simulação aplicados a todos os casos; os que ficam sem valor não são repassados
+    parser.add_argument("-N", "--steps", type=int, default=None, help="número de passos")
+    parser.add_argument("--h", type=float, default=None, help="tamanho do passo")
+    parser.add_argument("--end-time", type=float, default=None,
+                        help="tempo final; o passo passa a ser o maior estável e N é calculado")
+    parser.add_argument("--safety-factor", type=float, default=None,
+                        help="fração do passo crítico estimado usada como passo")
+    parser.add_argument("--mass", type=float, default=None, help="massa das partículas")
+    parser.add_argument("--kspr", type=float, default=None, help="rigidez das molas")
+    parser.add_argument("--radius", type=float, default=None, help="raio das partículas")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    options = dict(N=arguments.steps, h=arguments.h, end_time=arguments.end_time,
+                   safety_factor=arguments.safety_factor, mass=arguments.mass, kspr=arguments.kspr,
+                   raio=arguments.radius)
+    options = {name: value for name, value in options.items() if value is not None}
+    names, particles, responses = run_ensemble(arguments.base, read_load_cases(arguments.cases), arguments.workers,
+                                               arguments.output, **options)
+    for name, response in zip(names, responses):
+        # Casos mais curtos são completados com NaN; o último valor é o último passo calculado
+        final = response[~np.isnan(response)][-1]
+        print(f"{name:>20} deslocamento final {final: .6e}")
@@ -0,0 +1,180 @@
+import argparse
+import time
+
+import numpy as np
+
+from pvi import build_unique_bonds, choose_particle_to_follow, read_json_file, simulate
+from pvi_kernels import BondForces
+
+try:
+    import scipy.sparse as sp
+    import scipy.sparse.linalg as spla
+except ImportError:  # SciPy é opcional, sem ela o sistema de Newton é resolvido com matriz densa
+    sp = None
+    spla = None
+
+
+def tangent_stiffness(coordinates, u, half_bonds, fixed, raio, kspr, diagonal_shift=0.0, scale=1.0):
+    """Monta `diagonal_shift * I + scale * K_T`, onde K_T é a rigidez tangente das ligações em `u`.
+
+    A força da ligação na partícula i é kspr (L - 2 raio) d / L, com d = x_i - x_k. A sua derivada em
+    relação a x_i é o bloco 2x2 kspr ((1 - 2 raio / L) I + (2 raio / L) n nᵀ), que entra com sinal +
+    nos blocos (i, i) e (k, k) e com sinal - nos blocos (i, k) e (k, i). As linhas e colunas dos graus de
+    liberdade restritos são trocadas pela identidade. Retorna uma matriz esparsa do SciPy ou um array
+    denso, se o SciPy não estiver instalado.
+    """
+    i, k = half_bonds
+    ndofs = 2 * len(coordinates)
+    d = (coordinates[i] + u[i]) - (coordinates[k] + u[k])
+    length = np.sqrt(np.sum(d * d, axis=1))
+    n = d / length[:, None]
+    ratio = 2 * raio / length
+    block = kspr * ((1.0 - ratio)[:, None, None] * np.eye(2) + ratio[:, None, None] * n[:, :, None] * n[:, None, :])
+
+    # Blocos (i, i), (k, k), (i, k) e (k, i) de cada ligação, expandidos para os graus de liberdade
+    block_rows = np.stack((i, k, i, k), axis=1)
+    block_cols = np.stack((i, k, k, i), axis=1)
+    signs = np.array([1.0, 1.0, -1.0, -1.0])
+    component = np.arange(2)
+    rows = 2 * block_rows[:, :, None, None] + component[None, None, :, None]
+    cols = 2 * block_cols[:, :, None, None] + component[None, None, None, :]
+    vals = scale * signs[None, :, None, None] * block[:, None, :, :]
+    rows, cols = np.broadcast_arrays(rows, cols)
+    rows, cols, vals = rows.ravel(), cols.ravel(), np.broadcast_to(vals, rows.shape).ravel()
+
+    fixed_dofs = fixed.ravel()
+    keep = ~fixed_dofs[rows] & ~fixed_dofs[cols]
+    diagonal = np.arange(ndofs)
+    diagonal_vals = np.where(fixed_dofs, 1.0, diagonal_shift)
+    rows = np.concatenate((rows[keep], diagonal))
+    cols = np.concatenate((cols[keep], diagonal))
+    vals = np.concatenate((vals[keep], diagonal_vals))
+
+    if sp is not None:
+        return sp.csc_matrix((vals, (rows, cols)), shape=(ndofs, ndofs))
+    matrix = np.zeros((ndofs, ndofs))
+    np.add.at(matrix, (rows, cols), vals)
+    return matrix
+
+
+def _solve(matrix, b):
+    if sp is not None:
+        return spla.spsolve(matrix, b)
+    return np.linalg.solve(matrix, b)
+
+
+def newmark_integrate(coordinates, half_bonds, external_forces, fixed, raio, mass, kspr, h, N, alpha=0.0,
+                      tol=1e-6, max_newton=25, on_step=None):
+    """Integra o movimento das partículas com o método HHT-alfa (Newmark-beta quando alpha = 0).
+
+    Com alpha em [-1/3, 0], beta = (1 - alpha)² / 4 e gamma = 1/2 - alpha, o esquema é incondicionalmente
+    estável; alpha < 0 introduz amortecimento numérico das altas frequências. Em cada passo o equilíbrio
+    M a + (1 + alpha) fi(u_n+1) - alpha fi(u_n) = F é resolvido pelo método de Newton, montando a rigidez
+    tangente esparsa a cada iteração, até que o resíduo ou a correção fiquem abaixo de `tol` em relação à
+    escala das forças ou do deslocamento. `on_step(passo, u)` é chamado ao final de cada passo. Retorna u, v,
+    a e um relatório com as iterações de Newton de cada passo e o tempo total.
+    """
+    if not -1.0 / 3.0 <= alpha <= 0.0:
+        raise ValueError("alpha deve estar entre -1/3 e 0")
+    beta = (1.0 - alpha) ** 2 / 4.0
+    gamma = 0.5 - alpha
+
+    bond_forces = BondForces(coordinates, half_bonds, raio, kspr)
+    free = ~fixed
+    u = np.zeros_like(coordinates)
+    v = np.zeros_like(coordinates)
+    fi = bond_forces(u, out=np.empty_like(coordinates))
+    a = (external_forces - fi) / mass
+    a[fixed] = 0.0
+
+    report = {"alpha": alpha, "h": h, "steps": N, "newton_iterations": [], "converged": True}
+    start = time.perf_counter()
+    for step in range(1, N + 1):
+        fi_previous = fi.copy()
+        # Preditor de Newmark: parte de u_n+1 que não depende de a_n+1
+        predictor = u + h * v + (0.5 - beta) * h * h * a
+        u_next = predictor.copy()
+        scale = max(np.linalg.norm(external_forces[free]), np.linalg.norm(fi_previous[free]), 1.0)
+
+        for iteration in range(1, max_newton + 1):
+            a_next = (u_next - predictor) / (beta * h * h)
+            fi = bond_forces(u_next, out=fi)
+            residual = mass * a_next + (1.0 + alpha) * fi - alpha * fi_previous - external_forces
+            residual[fixed] = 0.0
+            if np.linalg.norm(residual) <= tol * scale:
+                break
+            jacobian = tangent_stiffness(coordinates, u_next, half_bonds, fixed, raio, kspr,
+                                         diagonal_shift=mass / (beta * h * h), scale=1.0 + alpha)
+            correction = _solve(jacobian, residual.ravel()).reshape(u_next.shape)
+            u_next -= correction
+            # Com deslocamentos pequenos o resíduo esbarra no arredondamento de kspr (L - 2 raio), então a
+            # convergência também é aceita quando a correção de Newton se torna desprezível
+            if np.linalg.norm(correction) <= tol * np.linalg.norm(u_next):
+                break
+        else:
+            report["converged"] = False
+
+        a_next = (u_next - predictor) / (beta * h * h)
+        a_next[fixed] = 0.0
+        v += h * ((1.0 - gamma) * a + gamma * a_next)
+        v[fixed] = 0.0
+        u, a = u_next, a_next
+        report["newton_iterations"].append(iteration)
+        if on_step is not None:
+            on_step(step, u)
+
+    report["time"] = time.perf_counter() - start
+    return u, v, a, report
+
+
+def simulate_implicit(_file_name, h, N, alpha=0.0, raio=1.0, mass=7850.0, kspr=210000000000.0):
+    # Mesma saída de pvi.simulate (deslocamento da partícula acompanhada em cada passo), com o esquema implícito
+    number_of_elements, coordinates_x, coordinates_y, connections, forces, restrictions = read_json_file(_file_name)
+    coordinates = np.hstack((coordinates_x, coordinates_y))
+    external_forces = forces.reshape(number_of_elements, 2)
+    fixed = restrictions.reshape(number_of_elements, 2) == 1
+    particle_to_follow = choose_particle_to_follow(forces=forces, restrictions=restrictions, choice="with_force")
+
+    res = np.zeros((N, 1), dtype=np.float64)
+
+    def record(step, u):
+        res[step - 1] = u.reshape(-1, 1)[particle_to_follow]
+
+    u, v, a, report = newmark_integrate(coordinates, build_unique_bonds(connections), external_forces, fixed, raio,
+                                        mass, kspr, h, N, alpha=alpha, on_step=record)
+    return res, report
+
+
+def compare_with_explicit(_file_name, step_factor=100, alpha=-0.1, h=0.00004, N=600):
+    # Compara o caminho explícito (h, N) com o implícito usando passos `step_factor` vezes maiores até o
+    # mesmo tempo final: passos, iterações de Newton, tempo total e deslocamento final acompanhado
+    start = time.perf_counter()
+    explicit = simulate(_file_name, backend="numpy", h=h, N=N)
+    explicit_time = time.perf_counter() - start
+
+    implicit_steps = max(N // step_factor, 1)
+    implicit, report = simulate_implicit(_file_name, h * N / implicit_steps, implicit_steps, alpha=alpha)
+    iterations = report["newton_iterations"]
+
+    print(f"{'esquema':>10} {'passos':>8} {'h':>10} {'Newton/passo':>13} {'tempo (s)':>10} {'u final':>14}")
+    print(f"{'explícito':>10} {N:>8} {h:>10.2e} {'-':>13} {explicit_time:>10.3f} {explicit[-1, 0]:>14.6e}")
+    print(f"{'HHT':>10} {implicit_steps:>8} {report['h']:>10.2e} {np.mean(iterations):>13.2f} "
+          f"{report['time']:>10.3f} {implicit[-1, 0]:>14.6e}")
+    return explicit, implicit, report
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Compara o Verlet explícito com o integrador implícito HHT-alfa.")
+    parser.add_argument("input", nargs="?", default="pvi2.json", help="arquivo de entrada (padrão: pvi2.json)")
+    parser.add_argument("--step-factor", type=int, default=100,
+                        help="quantas vezes o passo implícito é maior que o explícito")
+    parser.add_argument("--alpha", type=float, default=-0.1, help="parâmetro alfa do HHT, entre -1/3 e 0")
+    parser.add_argument("--h", type=float, default=0.00004, help="passo do caminho explícito")
+    parser.add_argument("-N", "--steps", type=int, default=600, help="número de passos do caminho explícito")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    compare_with_explicit(arguments.input, step_factor=arguments.step_factor, alpha=arguments.alpha, h=arguments.h,
+                          N=arguments.steps)
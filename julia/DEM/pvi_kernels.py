@@ -0,0 +1,325 @@
+import os
+from multiprocessing import get_context, shared_memory
+from threading import BrokenBarrierError
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # O Numba é opcional, sem ele usamos apenas NumPy
+    numba = None
+
+
+def has_numba():
+    return numba is not None
+
+
+class BondForces:
+    """Forças internas das ligações com todos os buffers alocados uma única vez.
+
+    Trabalha com o estado em arrays (n, 2). Com symmetric=True cada ligação (i < k) é calculada uma só
+    vez e aplica forças iguais e opostas às duas partículas; com symmetric=False as ligações são
+    direcionadas e a força vai apenas para a partícula i, escrita na linha i - first de `out`. As
+    restrições devem ser aplicadas em `u` antes da chamada.
+    """
+
+    def __init__(self, coordinates, bonds, raio, kspr, symmetric=True, first=0):
+        self.i, self.k = bonds
+        self.raio = raio
+        self.kspr = kspr
+        self.symmetric = symmetric
+        self._owner = self.i - first
+
+        # As coordenadas iniciais das extremidades de cada ligação não mudam durante a simulação
+        self._coordinates_i = coordinates[self.i]
+        self._coordinates_k = coordinates[self.k]
+
+        number_of_bonds = len(self.i)
+        self._d = np.empty((number_of_bonds, 2), dtype=np.float64)
+        self._work = np.empty((number_of_bonds, 2), dtype=np.float64)
+        self._di = np.empty(number_of_bonds, dtype=np.float64)
+        self._d2 = np.empty(number_of_bonds, dtype=np.float64)
+
+    def __call__(self, u, out):
+        # Posição atual das extremidades de cada ligação e diferença de posição entre elas
+        np.take(u, self.i, axis=0, out=self._d)
+        np.add(self._coordinates_i, self._d, out=self._d)
+        np.take(u, self.k, axis=0, out=self._work)
+        np.add(self._coordinates_k, self._work, out=self._work)
+        np.subtract(self._d, self._work, out=self._d)
+
+        # Distância entre as partículas e o quanto se sobrepõem ou estão afastadas
+        np.multiply(self._d, self._d, out=self._work)
+        np.add(self._work[:, 0], self._work[:, 1], out=self._di)
+        np.sqrt(self._di, out=self._di)
+        np.subtract(self._di, 2 * self.raio, out=self._d2)
+
+        # Força da mola na direção da ligação: kspr * d2 * d / di
+        np.multiply(self._d, self._d2[:, None], out=self._d)
+        np.divide(self._d, self._di[:, None], out=self._d)
+        np.multiply(self._d, self.kspr, out=self._d)
+
+        # Soma das forças em cada partícula: +f na partícula i e, se simétrica, -f na partícula k
+        number_of_elements = len(out)
+        for axis in range(2):
+            force = self._d[:, axis]
+            out[:, axis] = np.bincount(self._owner, weights=force, minlength=number_of_elements)
+            if self.symmetric:
+                out[:, axis] -= np.bincount(self.k, weights=force, minlength=number_of_elements)
+        return out
+
+
+class NumpyBackend:
+    """Passo de Verlet com operações vetorizadas do NumPy, atualizando o estado (n, 2) no lugar.
+
+    `contacts`, se informado, é um ContactForces cujas forças de contato são somadas às das ligações.
+    """
+
+    name = "numpy"
+
+    def __init__(self, coordinates, half_bonds, external_forces, fixed, raio, mass, kspr, h, contacts=None):
+        self.bond_forces = BondForces(coordinates, half_bonds, raio, kspr)
+        self.contacts = contacts
+        self.external_forces = external_forces
+        self.fixed = fixed
+        self.mass = mass
+        self.h = h
+        self._work = np.empty_like(coordinates)
+
+    def step(self, u, v, a, fi):
+        h = self.h
+        np.multiply(a, 0.5 * h, out=self._work)
+        v += self._work
+        np.multiply(v, h, out=self._work)
+        u += self._work
+
+        np.copyto(u, 0.0, where=self.fixed)
+        self.bond_forces(u, out=fi)
+        if self.contacts is not None:
+            self.contacts.add(u, fi)
+
+        np.subtract(self.external_forces, fi, out=a)
+        np.divide(a, self.mass, out=a)
+        np.multiply(a, 0.5 * h, out=self._work)
+        v += self._work
+
+    def close(self):
+        pass
+
+
+def _verlet_step(coordinates, bond_i, bond_k, external_forces, fixed, raio, mass, kspr, h, u, v, a, fi):
+    # Passo completo de Verlet num único laço por partícula e por ligação, para ser compilado pelo Numba
+    number_of_elements = coordinates.shape[0]
+    for p in range(number_of_elements):
+        for axis in range(2):
+            v[p, axis] += a[p, axis] * (0.5 * h)
+            u[p, axis] += v[p, axis] * h
+            if fixed[p, axis]:
+                u[p, axis] = 0.0
+            fi[p, axis] = 0.0
+
+    for b in range(bond_i.shape[0]):
+        i = bond_i[b]
+        k = bond_k[b]
+        d_x = (coordinates[i, 0] + u[i, 0]) - (coordinates[k, 0] + u[k, 0])
+        d_y = (coordinates[i, 1] + u[i, 1]) - (coordinates[k, 1] + u[k, 1])
+        di = np.sqrt(d_x * d_x + d_y * d_y)
+        d2 = di - 2 * raio
+        force_x = kspr * (d2 * d_x / di)
+        force_y = kspr * (d2 * d_y / di)
+        fi[i, 0] += force_x
+        fi[i, 1] += force_y
+        fi[k, 0] -= force_x
+        fi[k, 1] -= force_y
+
+    for p in range(number_of_elements):
+        for axis in range(2):
+            a[p, axis] = (external_forces[p, axis] - fi[p, axis]) / mass
+            v[p, axis] += a[p, axis] * (0.5 * h)
+
+
+_verlet_step_jit = numba.njit(cache=True)(_verlet_step) if has_numba() else None
+
+
+class NumbaBackend:
+    """Passo de Verlet compilado pelo Numba: ligações, soma das forças e atualização num só laço.
+
+    Com compiled=False o mesmo laço roda como Python puro, sem exigir o Numba; serve para conferir a
+    lógica do passo fundido em ambientes sem compilador, mas é ordens de grandeza mais lento.
+    """
+
+    name = "numba"
+
+    def __init__(self, coordinates, half_bonds, external_forces, fixed, raio, mass, kspr, h, compiled=True):
+        if compiled and not has_numba():
+            raise RuntimeError("O backend numba requer o Numba instalado")
+        self._step = _verlet_step_jit if compiled else _verlet_step
+        self.coordinates = np.ascontiguousarray(coordinates, dtype=np.float64)
+        self.bond_i = np.ascontiguousarray(half_bonds[0], dtype=np.int64)
+        self.bond_k = np.ascontiguousarray(half_bonds[1], dtype=np.int64)
+        self.external_forces = np.ascontiguousarray(external_forces, dtype=np.float64)
+        self.fixed = np.ascontiguousarray(fixed, dtype=np.bool_)
+        self.raio = float(raio)
+        self.mass = float(mass)
+        self.kspr = float(kspr)
+        self.h = float(h)
+
+    def step(self, u, v, a, fi):
+        self._step(self.coordinates, self.bond_i, self.bond_k, self.external_forces, self.fixed,
+                   self.raio, self.mass, self.kspr, self.h, u, v, a, fi)
+
+    def close(self):
+        pass
+
+
+def _shared_array(shape, blocks):
+    # Cria um array float64 em memória compartilhada, visível pelos processos de trabalho pelo nome
+    block = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+    blocks.append(block)
+    return np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+
+
+def _force_worker(coordinates, bonds, first, last, raio, kspr, u_name, fi_name, start, done, stop):
+    # Processo de trabalho: a cada passo espera o deslocamento atualizado, calcula as forças internas das
+    # partículas first..last-1 e as escreve na sua fatia do vetor compartilhado
+    u_block = shared_memory.SharedMemory(name=u_name)
+    fi_block = shared_memory.SharedMemory(name=fi_name)
+    shape = coordinates.shape
+    u = np.ndarray(shape, dtype=np.float64, buffer=u_block.buf)
+    fi = np.ndarray(shape, dtype=np.float64, buffer=fi_block.buf)
+    bond_forces = BondForces(coordinates, bonds, raio, kspr, symmetric=False, first=first)
+    try:
+        while True:
+            start.wait()
+            if stop.is_set():
+                break
+            bond_forces(u, out=fi[first:last])
+            done.wait()
+    except BrokenBarrierError:
+        pass
+    except BaseException:
+        # Libera o processo principal, que receberia um BrokenBarrierError em vez de esperar para sempre
+        start.abort()
+        done.abort()
+        raise
+    finally:
+        del u, fi
+        u_block.close()
+        fi_block.close()
+
+
+class ParallelBackend:
+    """Passo de Verlet com as forças internas calculadas em paralelo por vários processos.
+
+    As partículas são divididas em faixas contíguas, uma por processo. Cada processo calcula as forças
+    das ligações das suas partículas e escreve só nas suas linhas do vetor de forças, então não há
+    soma entre processos. Deslocamento e forças ficam em memória compartilhada: nada é serializado a
+    cada passo, apenas duas barreiras sincronizam os processos. Chame close() ao final.
+    """
+
+    name = "parallel"
+
+    def __init__(self, coordinates, half_bonds, external_forces, fixed, raio, mass, kspr, h, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.external_forces = external_forces
+        self.fixed = fixed
+        self.mass = mass
+        self.h = h
+        self._work = np.empty_like(coordinates)
+
+        self._blocks = []
+        number_of_elements = len(coordinates)
+        self._u = _shared_array(coordinates.shape, self._blocks)
+        self._fi = _shared_array(coordinates.shape, self._blocks)
+
+        # Ligações direcionadas (cada ligação nas duas direções), ordenadas pela partícula dona da força
+        i, k = half_bonds
+        owner = np.concatenate((i, k))
+        neighbour = np.concatenate((k, i))
+        order = np.argsort(owner, kind="stable")
+        owner, neighbour = owner[order], neighbour[order]
+
+        particle_bounds = np.linspace(0, number_of_elements, self.workers + 1).astype(np.int64)
+        bond_bounds = np.searchsorted(owner, particle_bounds)
+
+        context = get_context()
+        self._start = context.Barrier(self.workers + 1)
+        self._done = context.Barrier(self.workers + 1)
+        self._stop = context.Event()
+        self._processes = []
+        for w in range(self.workers):
+            bonds = slice(bond_bounds[w], bond_bounds[w + 1])
+            process = context.Process(target=_force_worker, daemon=True,
+                                      args=(coordinates, (owner[bonds], neighbour[bonds]), particle_bounds[w],
+                                            particle_bounds[w + 1], raio, kspr, self._blocks[0].name,
+                                            self._blocks[1].name, self._start, self._done, self._stop))
+            process.start()
+            self._processes.append(process)
+
+    def step(self, u, v, a, fi):
+        h = self.h
+        np.multiply(a, 0.5 * h, out=self._work)
+        v += self._work
+        np.multiply(v, h, out=self._work)
+        u += self._work
+        np.copyto(u, 0.0, where=self.fixed)
+
+        # Publica o deslocamento e espera todos os processos terminarem o cálculo das forças
+        np.copyto(self._u, u)
+        self._start.wait()
+        self._done.wait()
+        np.copyto(fi, self._fi)
+
+        np.subtract(self.external_forces, fi, out=a)
+        np.divide(a, self.mass, out=a)
+        np.multiply(a, 0.5 * h, out=self._work)
+        v += self._work
+
+    def close(self):
+        if not self._processes:
+            return
+        self._stop.set()
+        try:
+            self._start.wait()
+        except BrokenBarrierError:
+            pass
+        for process in self._processes:
+            process.join()
+        self._processes = []
+
+        del self._u, self._fi
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+BACKENDS = {"numpy": NumpyBackend, "numba": NumbaBackend, "parallel": ParallelBackend}
+
+
+def available_backends():
+    return [name for name in BACKENDS if name != "numba" or has_numba()]
+
+
+def select_backend(name="auto", contacts=False):
+    # Com "auto" usa o backend compilado quando o Numba está disponível e o NumPy caso contrário. A
+    # detecção de contatos só existe no backend NumPy.
+    if name == "auto":
+        return "numba" if has_numba() and not contacts else "numpy"
+    if contacts and name != "numpy":
+        raise ValueError(f"O backend {name} não tem detecção de contatos; use o backend numpy")
+    if name not in BACKENDS:
+        raise ValueError(f"Backend desconhecido: {name}")
+    return name
+
+
+def make_backend(name, coordinates, half_bonds, external_forces, fixed, raio, mass, kspr, h, workers=None,
+                 contacts=None):
+    # `workers` é o número de processos do backend paralelo e `contacts` as forças de contato do backend
+    # NumPy; os demais backends os ignoram
+    name = select_backend(name, contacts=contacts is not None)
+    if name == "parallel":
+        return ParallelBackend(coordinates, half_bonds, external_forces, fixed, raio, mass, kspr, h, workers=workers)
+    if name == "numpy":
+        return NumpyBackend(coordinates, half_bonds, external_forces, fixed, raio, mass, kspr, h, contacts=contacts)
+    return BACKENDS[name](coordinates, half_bonds, external_forces, fixed, raio, mass, kspr, h)
@@ -0,0 +1,54 @@
+import sys
+
+import numpy as np
+
+from pvi import build_unique_bonds, choose_particle_to_follow, read_json_file, simulate
+from pvi_kernels import BACKENDS, NumbaBackend, available_backends, has_numba
+
+
+def simulate_fused_python(_file_name, h=0.00004, N=600, raio=1.0, mass=7850.0, kspr=210000000000.0):
+    # Mesma simulação de pvi.simulate com o laço fundido do backend numba (_verlet_step) rodando sem
+    # compilar, para que a sua lógica seja conferida mesmo sem o Numba instalado
+    number_of_elements, coordinates_x, coordinates_y, connections, forces, restrictions = read_json_file(_file_name)
+    external_forces = forces.reshape(number_of_elements, 2)
+    backend = NumbaBackend(np.hstack((coordinates_x, coordinates_y)), build_unique_bonds(connections),
+                           external_forces, restrictions.reshape(number_of_elements, 2) == 1, raio, mass, kspr, h,
+                           compiled=False)
+    particle_to_follow = choose_particle_to_follow(forces=forces, restrictions=restrictions, choice="with_force")
+
+    u, v, fi = (np.zeros((number_of_elements, 2)) for _ in range(3))
+    a = external_forces / mass
+    res = np.zeros((N, 1))
+    for i in range(N):
+        backend.step(u, v, a, fi)
+        res[i] = u.reshape(-1, 1)[particle_to_follow]
+    return res
+
+
+def check_backend_parity(files=("pvi.json", "pvi2.json"), rtol=1e-6):
+    # Executa cada backend disponível e compara o deslocamento acompanhado com o do backend NumPy.
+    # A ordem das somas das forças muda entre os backends, então a comparação é feita com tolerância
+    # relativa ao maior deslocamento. Sem o Numba, o laço do backend numba é conferido sem compilar.
+    ok = True
+    for file_name in files:
+        reference = simulate(file_name, backend="numpy")
+        scale = np.max(np.abs(reference))
+        for name in BACKENDS:
+            if name == "numba" and not has_numba():
+                result, name = simulate_fused_python(file_name), "numba (sem compilar)"
+            elif name not in available_backends():
+                print(f"{file_name:>12} {name:>8} indisponível")
+                continue
+            else:
+                result = simulate(file_name, backend=name)
+            difference = np.max(np.abs(result - reference)) / scale
+            passed = difference <= rtol
+            ok = ok and passed
+            print(f"{file_name:>12} {name:>8} diferença relativa {difference:.2e} {'ok' if passed else 'FALHOU'}")
+    return ok
+
+
+if __name__ == '__main__':
+    # Uso: python pvi_parity.py [arquivo1.json arquivo2.json ...]
+    files = sys.argv[1:] or ("pvi.json", "pvi2.json")
+    sys.exit(0 if check_backend_parity(files) else 1)
@@ -0,0 +1,89 @@
+import json
+import os
+
+import numpy as np
+
+# Componentes gravadas para cada partícula em cada quadro
+FIELDS = ("x", "y", "vx", "vy")
+
+
+def header_file_name(file_name):
+    # O cabeçalho fica ao lado do arquivo de dados: trajetoria.npy -> trajetoria.json
+    return file_name[:-4] + ".json" if file_name.endswith(".npy") else file_name + ".json"
+
+
+class TrajectoryRecorder:
+    """Grava posições e velocidades das partículas num arquivo .npy mapeado em memória.
+
+    O arquivo tem forma (quadros, partículas, 4), com as componentes x, y, vx e vy, e um quadro a cada
+    `stride` passos, incluindo o estado inicial (passo 0). Os dados vão direto para o arquivo, então o uso
+    de memória não cresce com o número de passos. `particles` seleciona um subconjunto das partículas
+    (índices a partir de zero); sem ele todas são gravadas. Um cabeçalho JSON descreve o layout e o número
+    de quadros gravados, e é atualizado por flush() a cada `flush_every` quadros, para que uma execução
+    interrompida sem chegar a close() continue legível até o último flush. Com resume=True um arquivo já
+    existente é reaberto para continuar a gravação de uma simulação retomada.
+    """
+
+    def __init__(self, file_name, coordinates, steps, stride=1, particles=None, h=None, resume=False,
+                 flush_every=100):
+        self.file_name = file_name
+        self.stride = stride
+        self.flush_every = flush_every
+        self.particles = None if particles is None else np.asarray(particles, dtype=np.int64)
+        self.coordinates = coordinates if self.particles is None else coordinates[self.particles]
+        self.frames = 0
+
+        shape = (steps // stride + 1, len(self.coordinates), len(FIELDS))
+        flushed = 0
+        if resume and os.path.exists(file_name):
+            # Até o próximo flush continuam valendo os quadros que a execução interrompida chegou a gravar
+            if os.path.exists(header_file_name(file_name)):
+                with open(header_file_name(file_name), "r") as f:
+                    flushed = json.load(f)["frames"]
+            self._data = np.load(file_name, mmap_mode="r+")
+            if self._data.shape != shape:
+                raise ValueError(f"A trajetória {file_name} não tem a forma esperada {shape}")
+        else:
+            self._data = np.lib.format.open_memmap(file_name, mode="w+", dtype=np.float64, shape=shape)
+        self.header = {"fields": list(FIELDS), "shape": list(shape), "stride": stride, "h": h, "frames": flushed,
+                       "particles": None if self.particles is None else self.particles.tolist()}
+        self._write_header()
+
+    def _write_header(self):
+        with open(header_file_name(self.file_name), "w") as f:
+            json.dump(self.header, f)
+
+    def record(self, step, u, v):
+        if step % self.stride != 0:
+            return
+        frame = self._data[step // self.stride]
+        if self.particles is None:
+            np.add(self.coordinates, u, out=frame[:, 0:2])
+            frame[:, 2:4] = v
+        else:
+            np.add(self.coordinates, u[self.particles], out=frame[:, 0:2])
+            frame[:, 2:4] = v[self.particles]
+        self.frames = step // self.stride + 1
+        if self.frames - self.header["frames"] >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        # Grava os quadros pendentes e só depois o cabeçalho, que nunca conta quadros ainda não gravados
+        if self._data is None:
+            return
+        self._data.flush()
+        self.header["frames"] = self.frames
+        self._write_header()
+
+    def close(self):
+        self.flush()
+        self._data = None
+
+
+def read_trajectory(file_name):
+    # Retorna o array (quadros, partículas, 4) mapeado em memória, somente leitura, já limitado aos quadros
+    # gravados, e o cabeçalho com o layout
+    with open(header_file_name(file_name), "r") as f:
+        header = json.load(f)
+    data = np.load(file_name, mmap_mode="r")
+    return data[:header["frames"]], header
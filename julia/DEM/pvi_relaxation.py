@@ -0,0 +1,141 @@
+import argparse
+import time
+
+import numpy as np
+
+from pvi import build_unique_bonds, critical_time_step, read_json_file
+from pvi_kernels import BondForces
+
+DAMPING = ("kinetic", "viscous")
+
+
+def dynamic_relaxation(coordinates, half_bonds, external_forces, fixed, raio, mass, kspr, h, damping="kinetic",
+                       tol=1e-6, max_steps=100_000):
+    """Procura o equilíbrio estático pelo método da relaxação dinâmica.
+
+    O Verlet explícito é integrado com passo `h`, de preferência próximo do passo crítico, e com
+    amortecimento, de modo que o movimento se extingue e o deslocamento converge para o equilíbrio:
+    - "kinetic": sem amortecimento viscoso; sempre que a energia cinética total passa por um máximo as
+      velocidades são zeradas;
+    - "viscous": amortecimento c v, com c = 2 omega atualizado a cada passo pelo quociente de Rayleigh
+      uᵀ K u / uᵀ M u do deslocamento atual (amortecimento crítico do modo dominante).
+
+    Para quando a norma da força residual nos graus de liberdade livres cai abaixo de `tol` vezes a
+    inicial e a energia cinética cai abaixo de `tol` vezes o seu máximo. Retorna o deslocamento (n, 2) e
+    um relatório com os passos usados.
+    """
+    if damping not in DAMPING:
+        raise ValueError(f"Amortecimento desconhecido: {damping}")
+
+    bond_forces = BondForces(coordinates, half_bonds, raio, kspr)
+    free = ~fixed
+
+    u = np.zeros_like(coordinates)
+    v = np.zeros_like(coordinates)
+    fi = np.zeros_like(coordinates)
+    residual = np.empty_like(coordinates)
+    work = np.empty_like(coordinates)
+
+    # Força interna com deslocamento nulo: a malha pode começar com as molas pré-tensionadas
+    fi_initial = bond_forces(u, out=np.empty_like(coordinates))
+    np.subtract(external_forces, fi_initial, out=residual)
+    residual[fixed] = 0.0
+    initial_residual = np.linalg.norm(residual)
+    report = {"damping": damping, "h": h, "steps": 0, "converged": initial_residual == 0.0, "resets": 0,
+              "residual": 1.0 if initial_residual > 0.0 else 0.0, "kinetic_energy": 0.0}
+    if report["converged"]:
+        return u, report
+
+    start = time.perf_counter()
+    c = 0.0
+    # Partindo do repouso, o primeiro incremento de velocidade é de meio passo (v_1/2 = h/2 a_0)
+    velocity_step = 0.5 * h
+    previous_kinetic = 0.0
+    peak_kinetic = 0.0
+    for step in range(1, max_steps + 1):
+        # residual = (F - fi) / m é a aceleração; v e u seguem o esquema leapfrog
+        np.divide(residual, mass, out=work)
+        work *= velocity_step
+        if damping == "viscous":
+            v *= (1.0 - 0.5 * c * h)
+            v += work
+            v /= (1.0 + 0.5 * c * h)
+        else:
+            v += work
+        np.copyto(v, 0.0, where=fixed)
+        velocity_step = h
+
+        np.multiply(v, h, out=work)
+        u += work
+        bond_forces(u, out=fi)
+        np.subtract(external_forces, fi, out=residual)
+        residual[fixed] = 0.0
+
+        if damping == "viscous":
+            # uᵀ K u é aproximado pelo trabalho da variação da força interna desde a configuração inicial
+            np.subtract(fi, fi_initial, out=work)
+            stiffness = np.sum(u[free] * work[free])
+            displacement = np.sum(u[free] * u[free])
+            c = 2.0 * np.sqrt(max(stiffness / (mass * displacement), 0.0)) if displacement > 0.0 else 0.0
+
+        kinetic = 0.5 * mass * np.sum(v * v)
+        if damping == "kinetic" and kinetic < previous_kinetic:
+            # A energia cinética passou pelo máximo no passo anterior: o último deslocamento é desfeito,
+            # as velocidades são zeradas e o movimento recomeça do repouso a partir dessa posição
+            np.multiply(v, h, out=work)
+            u -= work
+            bond_forces(u, out=fi)
+            np.subtract(external_forces, fi, out=residual)
+            residual[fixed] = 0.0
+            v[:] = 0.0
+            velocity_step = 0.5 * h
+            report["resets"] += 1
+            kinetic = 0.0
+        previous_kinetic = kinetic
+        peak_kinetic = max(peak_kinetic, kinetic)
+
+        relative_residual = np.linalg.norm(residual) / initial_residual
+        if relative_residual <= tol and kinetic <= tol * peak_kinetic:
+            report["converged"] = True
+            break
+
+    report.update(steps=step, residual=relative_residual, kinetic_energy=kinetic,
+                  time=time.perf_counter() - start)
+    return u, report
+
+
+def relax_file(_file_name, damping="kinetic", tol=1e-6, max_steps=100_000, safety_factor=0.9, raio=1.0,
+               mass=7850.0, kspr=210000000000.0):
+    # Lê um arquivo no formato de pvi.json e retorna o deslocamento de equilíbrio e o relatório. O passo é
+    # uma fração `safety_factor` do passo crítico estimado.
+    number_of_elements, coordinates_x, coordinates_y, connections, forces, restrictions = read_json_file(_file_name)
+    coordinates = np.hstack((coordinates_x, coordinates_y))
+    external_forces = forces.reshape(number_of_elements, 2)
+    fixed = restrictions.reshape(number_of_elements, 2) == 1
+    h = safety_factor * critical_time_step(connections, mass, kspr)
+    return dynamic_relaxation(coordinates, build_unique_bonds(connections), external_forces, fixed, raio, mass, kspr,
+                              h, damping=damping, tol=tol, max_steps=max_steps)
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Equilíbrio estático das partículas por relaxação dinâmica.")
+    parser.add_argument("input", nargs="?", default="pvi2.json", help="arquivo de entrada (padrão: pvi2.json)")
+    parser.add_argument("--damping", choices=DAMPING, default="kinetic", help="tipo de amortecimento")
+    parser.add_argument("--tol", type=float, default=1e-6, help="resíduo relativo para o equilíbrio")
+    parser.add_argument("--max-steps", type=int, default=100_000, help="número máximo de passos")
+    parser.add_argument("--safety-factor", type=float, default=0.9, help="fração do passo crítico usada como passo")
+    parser.add_argument("--mass", type=float, default=7850.0, help="massa das partículas")
+    parser.add_argument("--kspr", type=float, default=210000000000.0, help="rigidez das molas")
+    parser.add_argument("--radius", type=float, default=1.0, help="raio das partículas")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    u, report = relax_file(arguments.input, damping=arguments.damping, tol=arguments.tol,
+                           max_steps=arguments.max_steps, safety_factor=arguments.safety_factor,
+                           raio=arguments.radius, mass=arguments.mass, kspr=arguments.kspr)
+    print(f"{report['damping']}: {report['steps']} passos, convergiu={report['converged']}, "
+          f"resíduo relativo {report['residual']:.2e}, {report['resets']} reinícios, h={report['h']:.3e}, "
+          f"{report['time']:.3f} s")
+    print(f"maior deslocamento {np.max(np.abs(u)):.6e}")
@@ -1,7 +1,29 @@
+import argparse
+import hashlib
 import json
+import os
+import sys
 
 import numpy as np
 
+# A integração transiente usa os mesmos checkpoints atômicos da simulação de partículas (DEM/pvi_checkpoint.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "DEM"))
+
+from pvi_checkpoint import input_hash, load_checkpoint, save_checkpoint
+from pvc_grid import PlateGrid, fast_poisson_solve, grid_layout, multigrid_solve, nested_iteration_solve, relaxation_solve
+from pvc_sparse import BandedCholesky, Factorization, build_sparse_matrix, conjugate_gradient, has_scipy, sparse_direct_solve
+from pvc_transient import SCHEMES, integrate
+
+
+# Fatorações já calculadas, indexadas pelo connect e pela máscara de pontos prescritos
+_factorizations = {}
+
+# Métodos aceitos por solve_temperatures
+SOLVERS = ("dense", "sparse", "reduced", "banded", "cg", "sor", "jacobi", "multigrid", "multigrid-f", "fft")
+
+# Solvers iterativos, os únicos que aceitam a iteração aninhada
+NESTED_SOLVERS = ("cg", "sor", "jacobi", "multigrid", "multigrid-f")
+
 
 def read_json(file_name):
     with open(file_name, 'r') as file:
@@ -9,34 +31,357 @@ def read_json(file_name):
     return np.array(data['connect']), np.array(data['temperatures']), int(data['rows']), int(data['columns'])
 
 
-def solve_temperatures(connections, temperatures):
+def solve_temperatures(connections, temperatures, solver="dense", rows=None, columns=None, stats=None,
+                       initial=None, nested=False, compare_cold_start=False):
+    # `stats`, se informado, é um dicionário preenchido pelos solvers iterativos (iterações, resíduos).
+    # `initial` é uma aproximação inicial (nn, 1) para os solvers iterativos e `nested` ativa a
+    # iteração aninhada, que parte de soluções em versões engrossadas da placa. `compare_cold_start`
+    # resolve a placa também a partir do zero, só para medir a economia da iteração aninhada.
+    if nested:
+        return solve_temperatures_nested(connections, temperatures, rows, columns, solver, stats, initial,
+                                         compare_cold_start)
+    if solver == "sparse":
+        # Sem SciPy, "sparse" recai no gradiente conjugado sobre o sistema reduzido
+        return solve_temperatures_sparse(connections, temperatures, use_direct=has_scipy(), stats=stats)
+    if solver == "reduced":
+        return solve_temperatures_sparse(connections, temperatures, reduced=True, stats=stats)
+    if solver == "cg":
+        return solve_temperatures_sparse(connections, temperatures, use_direct=False, stats=stats, initial=initial)
+    if solver == "banded":
+        return solve_temperatures_banded(connections, temperatures, stats=stats)
+    if solver in ("sor", "jacobi", "multigrid", "multigrid-f", "fft"):
+        return solve_temperatures_on_grid(connections, temperatures, rows, columns, solver, stats, initial)
+    if solver != "dense":
+        raise ValueError(f"Solver desconhecido: {solver}")
+
+    A, b = assemble_system(connections, temperatures, sparse=False)
+
+    # Resolve o sistema para encontrar as temperaturas desconhecidas
+    return np.linalg.solve(A, b)
+
+
+def assemble_triplets(connections, temperatures):
+    # Monta o sistema como triplas (linha, coluna, valor) de uma só vez, usando máscaras do NumPy
+    # em vez de percorrer os pontos um a um. Entradas repetidas devem ser somadas, como no `+=` do laço.
     nn = len(temperatures)
+    fixed = temperatures[:, 0] == 1
+    neighbours = np.asarray(connections)[:, 1:]
+
+    # Pontos com temperatura conhecida: Ti = valor conhecido.
+    # Pontos com temperatura desconhecida: -4 * Ti + soma dos vizinhos = 0
+    diag = np.arange(nn, dtype=np.int64)
+    diag_vals = np.where(fixed, 1.0, -4.0)
+
+    free_neighbours = neighbours[~fixed]
+    has_neighbour = free_neighbours != 0
+    free_rows = np.broadcast_to(np.flatnonzero(~fixed)[:, None], free_neighbours.shape)
+
+    rows = np.concatenate((diag, free_rows[has_neighbour]))
+    cols = np.concatenate((diag, free_neighbours[has_neighbour].astype(np.int64) - 1))
+    vals = np.concatenate((diag_vals, np.ones(np.count_nonzero(has_neighbour))))
+
+    b = np.zeros((nn, 1))
+    b[fixed, 0] = temperatures[fixed, 1]
+
+    return rows, cols, vals, b
+
+
+def assemble_system(connections, temperatures, sparse=True):
+    nn = len(temperatures)
+    rows, cols, vals, b = assemble_triplets(connections, temperatures)
+
+    if sparse:
+        return build_sparse_matrix(rows, cols, vals, nn), b
 
-    # Inicializa a matriz A e o vetor b para o sistema linear Ax = b
     A = np.zeros((nn, nn))
+    np.add.at(A, (rows, cols), vals)
+    return A, b
+
+
+def assemble_triplets_loop(connections, temperatures):
+    # Versão original da montagem, ponto a ponto. Mantida como referência para comparar
+    # resultados e tempos com a montagem vetorizada.
+    nn = len(temperatures)
+    rows, cols, vals = [], [], []
     b = np.zeros((nn, 1))
 
     # Itera sobre cada ponto na placa
     for e in range(nn):
         if temperatures[e, 0] == 1:
             # Para pontos com temperaturas conhecidas, define a equação Ti = valor conhecido
-            A[e, e] = 1
+            rows.append(e)
+            cols.append(e)
+            vals.append(1.0)
             b[e, 0] = temperatures[e, 1]
         else:
             # Para pontos com temperaturas desconhecidas, aplica a discretização da equação de
             # Laplace usando o método das diferenças finitas.
             # A equação de Laplace é: ∇²T = 0
             # Quando discretizada em uma grade regular, isso leva a -4 * Ti + T(i+1) + T(i-1) + T(i+n) + T(i-n) = 0
-            A[e, e] = -4
+            rows.append(e)
+            cols.append(e)
+            vals.append(-4.0)
             for j in connections[e][1:len(connections[e])]:
                 if j != 0:
-                    A[e, j - 1] += 1
+                    rows.append(e)
+                    cols.append(j - 1)
+                    vals.append(1.0)
 
-    # Resolve o sistema para encontrar as temperaturas desconhecidas
-    return np.linalg.solve(A, b)
+    return np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64), np.array(vals), b
+
+
+def reduce_system(connections, temperatures):
+    # Remove as linhas e colunas dos pontos de temperatura conhecida, levando sua contribuição
+    # para o lado direito. O sistema restante, com o sinal trocado (4 na diagonal e -1 nos vizinhos),
+    # é simétrico positivo definido e só tem os pontos de temperatura desconhecida.
+    nn = len(temperatures)
+    fixed = temperatures[:, 0] == 1
+    rows, cols, vals, b = assemble_triplets(connections, temperatures)
+    free = np.flatnonzero(~fixed)
+
+    new_index = np.full(nn, -1, dtype=np.int64)
+    new_index[free] = np.arange(len(free))
+
+    in_free_rows = ~fixed[rows]
+    rows, cols, vals = rows[in_free_rows], cols[in_free_rows], vals[in_free_rows]
+    to_fixed = fixed[cols]
+
+    rhs = np.zeros(len(free))
+    np.add.at(rhs, new_index[rows[to_fixed]], vals[to_fixed] * b[cols[to_fixed], 0])
+
+    K = build_sparse_matrix(new_index[rows[~to_fixed]], new_index[cols[~to_fixed]], -vals[~to_fixed], len(free))
+    return K, rhs, free
+
+
+def expand_solution(x_free, free, temperatures):
+    # Devolve as temperaturas de todos os pontos, juntando as calculadas com as prescritas
+    fixed = temperatures[:, 0] == 1
+    x = np.zeros((len(temperatures), 1))
+    x[fixed, 0] = temperatures[fixed, 1]
+    x[free, 0] = np.ravel(x_free)
+    return x
+
+
+def to_plate_field(x, connections, rows, columns):
+    # Distribui as temperaturas na matriz rows x columns da placa; posições sem ponto ficam com zero
+    if len(x) == rows * columns:
+        return np.reshape(x, (rows, columns))
+    node_rows, node_cols = grid_layout(connections, rows, columns)
+    field = np.zeros((max(rows, node_rows.max() + 1), max(columns, node_cols.max() + 1)))
+    field[node_rows, node_cols] = np.ravel(x)
+    return field
+
+
+def solve_temperatures_sparse(connections, temperatures, use_direct=True, reduced=False, stats=None, initial=None):
+    if use_direct and has_scipy() and not reduced:
+        nn = len(temperatures)
+        rows, cols, vals, b = assemble_triplets(connections, temperatures)
+        A = build_sparse_matrix(rows, cols, vals, nn)
+        return sparse_direct_solve(A, b)
+
+    K, rhs, free = reduce_system(connections, temperatures)
+    if len(free) == 0:
+        return expand_solution(rhs, free, temperatures)
+
+    if use_direct:
+        # Sistema reduzido simétrico positivo definido: fatoração em modo simétrico
+        x_free = Factorization(K, symmetric=True).solve(rhs)
+    else:
+        # Gradiente conjugado pré-condicionado sobre os pontos de temperatura desconhecida
+        x0 = None if initial is None else np.ravel(initial)[free]
+        x_free, residuals = conjugate_gradient(K, rhs, x0=x0)
+        _record_stats(stats, residuals)
+    return expand_solution(x_free, free, temperatures)
+
+
+def solve_temperatures_banded(connections, temperatures, reorder="auto", stats=None):
+    # Com a numeração por linhas a matriz reduzida tem largura de banda próxima do número de colunas,
+    # então a fatoração de Cholesky em banda custa O(n * colunas²)
+    K, rhs, free = reduce_system(connections, temperatures)
+    if len(free) == 0:
+        return expand_solution(rhs, free, temperatures)
 
+    factorization = BandedCholesky(K, reorder=reorder)
+    if stats is not None:
+        stats["bandwidth"] = factorization.bandwidth
+        stats["reordered"] = factorization.permutation is not None
+    return expand_solution(factorization.solve(rhs), free, temperatures)
 
-def save_into_json_file(m_temperatures, rows, columns):
+
+def _grid_backend(solver):
+    # Solver iterativo no formato usado pela iteração aninhada: (grade, campo inicial, tolerância) -> (campo,
+    # resíduos). Com tol=None vale a tolerância padrão do solver, a mesma da solução sem iteração aninhada.
+    def backend(grid, initial, tol=None):
+        options = {} if tol is None else {"tol": tol}
+        if solver == "cg":
+            connections, temperatures = grid.to_connect()
+            K, rhs, free = reduce_system(connections, temperatures)
+            if len(free) == 0:
+                return grid.to_field(expand_solution(rhs, free, temperatures)), [0.0]
+            x0 = None if initial is None else grid.to_nodes(initial)[free, 0]
+            x_free, residuals = conjugate_gradient(K, rhs, x0=x0, **options)
+            return grid.to_field(expand_solution(x_free, free, temperatures)), residuals
+        if solver.startswith("multigrid"):
+            return multigrid_solve(grid, cycle="F" if solver == "multigrid-f" else "V", initial=initial, **options)
+        return relaxation_solve(grid, method=solver, initial=initial, **options)
+
+    return backend
+
+
+def _plate_grid(connections, temperatures, rows, columns, solver):
+    if rows is None or columns is None:
+        raise ValueError(f"O solver {solver} precisa do número de linhas e colunas da placa")
+    return PlateGrid.from_connect(connections, temperatures, rows, columns)
+
+
+def solve_temperatures_on_grid(connections, temperatures, rows, columns, solver, stats=None, initial=None):
+    # Solvers sem matriz: trabalham direto na grade rows x columns, com memória O(n)
+    grid = _plate_grid(connections, temperatures, rows, columns, solver)
+    if solver == "fft":
+        field, residuals, capacitance_points = fast_poisson_solve(grid)
+        if stats is not None:
+            stats["capacitance_points"] = capacitance_points
+    else:
+        field, residuals = _grid_backend(solver)(grid, None if initial is None else grid.to_field(initial))
+    _record_stats(stats, residuals)
+    return grid.to_nodes(field)
+
+
+def solve_temperatures_nested(connections, temperatures, rows, columns, solver, stats=None, initial=None,
+                              compare_cold_start=False):
+    # Iteração aninhada para qualquer solver iterativo. Com compare_cold_start=True a solução também é
+    # calculada partindo do zero, para registrar em `stats` quantas iterações foram economizadas.
+    if solver not in NESTED_SOLVERS:
+        raise ValueError(f"A iteração aninhada requer um solver iterativo, não {solver}")
+
+    grid = _plate_grid(connections, temperatures, rows, columns, solver)
+    field, residuals, report = nested_iteration_solve(grid, _grid_backend(solver),
+                                                      initial=None if initial is None else grid.to_field(initial),
+                                                      compare_cold_start=compare_cold_start)
+    _record_stats(stats, residuals)
+    if stats is not None:
+        stats["nested"] = report
+    return grid.to_nodes(field)
+
+
+def _record_stats(stats, residuals):
+    if stats is not None:
+        stats["iterations"] = len(residuals) - 1
+        stats["residuals"] = residuals
+        # Fator de redução do resíduo em cada iteração (ou ciclo, no multigrid)
+        stats["reductions"] = [residuals[k + 1] / residuals[k] for k in range(len(residuals) - 1)]
+
+
+def solve_transient_temperatures(connections, temperatures, dt, steps, alpha=1.0, scheme="crank-nicolson",
+                                 initial_temperature=0.0, stride=1, snapshot_file=None, checkpoint_file=None,
+                                 checkpoint_every=100, resume=False):
+    # Condução transiente a partir da placa a `initial_temperature`, com as temperaturas prescritas
+    # fixas. As temperaturas de todos os pontos são gravadas em `snapshot_file` (.npy, uma linha por
+    # instantâneo) à medida que a integração avança, sem guardar o histórico em memória. Com
+    # `checkpoint_file` a temperatura dos pontos livres é gravada a cada `checkpoint_every` passos e, com
+    # resume=True, a integração continua do último checkpoint, com o mesmo resultado de uma execução sem
+    # interrupção.
+    K, rhs, free = reduce_system(connections, temperatures)
+    x0 = np.full(len(free), float(initial_temperature))
+
+    first_step = 0
+    on_checkpoint = None
+    if checkpoint_file is not None:
+        key = input_hash((connections, temperatures), dict(dt=dt, steps=steps, alpha=alpha, scheme=scheme,
+                                                           initial_temperature=initial_temperature, stride=stride))
+        if resume and os.path.exists(checkpoint_file):
+            first_step, state = load_checkpoint(checkpoint_file, key)
+            x0 = state["x_free"]
+
+    snapshots = None
+    on_snapshot = None
+    if snapshot_file is not None:
+        shape = (steps // stride + 1, len(temperatures))
+        if first_step > 0 and os.path.exists(snapshot_file):
+            # Os instantâneos até o checkpoint já estão no arquivo da execução interrompida
+            snapshots = np.load(snapshot_file, mmap_mode="r+")
+            if snapshots.shape != shape:
+                raise ValueError(f"O arquivo {snapshot_file} não corresponde ao transiente do checkpoint")
+        else:
+            snapshots = np.lib.format.open_memmap(snapshot_file, mode="w+", dtype=np.float64, shape=shape)
+
+        def on_snapshot(step, x_free):
+            snapshots[step // stride] = expand_solution(x_free, free, temperatures)[:, 0]
+
+    if checkpoint_file is not None:
+        def on_checkpoint(step, x_free):
+            # Os instantâneos vão para o disco antes do checkpoint que os pressupõe gravados
+            if snapshots is not None:
+                snapshots.flush()
+            save_checkpoint(checkpoint_file, step, key, x_free=x_free)
+
+    x_free, substeps = integrate(K, rhs, x0, dt, steps, alpha, scheme, stride, on_snapshot, first_step,
+                                 checkpoint_every, on_checkpoint)
+
+    if snapshots is not None:
+        snapshots.flush()
+        del snapshots
+    return expand_solution(x_free, free, temperatures), substeps
+
+
+def operator_key(connections, fixed):
+    # O operador depende apenas das conexões e de quais pontos têm temperatura prescrita,
+    # não dos valores prescritos
+    connections = np.ascontiguousarray(connections, dtype=np.int64)
+    digest = hashlib.sha1(str(connections.shape).encode())
+    digest.update(connections.tobytes())
+    digest.update(np.packbits(fixed).tobytes())
+    return digest.hexdigest()
+
+
+def factorize_operator(connections, fixed):
+    # Monta e fatora o operador uma única vez para cada geometria e conjunto de pontos prescritos. Fatora o
+    # sistema reduzido aos pontos livres, simétrico positivo definido, para que sem o SciPy se use a
+    # fatoração de Cholesky em banda e não a inversa densa do operador completo.
+    key = operator_key(connections, fixed)
+    if key not in _factorizations:
+        pattern = np.column_stack((fixed, np.zeros(len(fixed))))
+        K, _, _ = reduce_system(connections, pattern)
+        _factorizations[key] = Factorization(K, symmetric=True)
+    return _factorizations[key]
+
+
+def solve_temperature_scenarios(connections, scenarios):
+    # Resolve vários conjuntos de temperaturas prescritas sobre a mesma placa. Cenários com os
+    # mesmos pontos prescritos compartilham a fatoração e são resolvidos juntos, um por coluna.
+    scenarios = [np.asarray(temperatures, dtype=np.float64) for temperatures in scenarios]
+    results = [None] * len(scenarios)
+
+    groups = {}
+    for index, temperatures in enumerate(scenarios):
+        fixed = temperatures[:, 0] == 1
+        groups.setdefault(fixed.tobytes(), (fixed, []))[1].append(index)
+
+    for fixed, indices in groups.values():
+        free = np.flatnonzero(~fixed)
+        if len(free) == 0:
+            for index in indices:
+                results[index] = expand_solution(np.zeros(0), free, scenarios[index])
+            continue
+        factorization = factorize_operator(connections, fixed)
+        # O lado direito do sistema reduzido vem dos valores prescritos de cada cenário
+        B = np.column_stack([reduce_system(connections, scenarios[index])[1] for index in indices])
+        X = factorization.solve(B)
+        for column, index in enumerate(indices):
+            results[index] = expand_solution(X[:, column], free, scenarios[index])
+
+    return results
+
+
+def read_scenarios(file_name):
+    # Arquivo de cenários: {"scenarios": [{"name": ..., "temperatures": [[prescrita?, valor], ...]}, ...]}
+    with open(file_name, 'r') as file:
+        data = json.load(file)
+    names = [str(scenario.get("name", index)) for index, scenario in enumerate(data["scenarios"])]
+    return names, [np.array(scenario["temperatures"]) for scenario in data["scenarios"]]
+
+
+def save_into_json_file(m_temperatures, rows, columns, file_name="output_pvc.json"):
 
     temperatures = []
 
@@ -52,13 +397,100 @@ def save_into_json_file(m_temperatures, rows, columns):
         "columns": columns
     }
 
-    with open("output_pvc.json", "w") as f:
+    with open(file_name, "w") as f:
         f.write(json.dumps(file_data))
 
 
-if __name__ == '__main__':
-    connections, temperatures, n_rows, n_columns = read_json("pvc2.json")
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Temperaturas numa placa pelo método das diferenças finitas.")
+    parser.add_argument("input", nargs="?", default="pvc2.json", help="arquivo de entrada (padrão: pvc2.json)")
+    parser.add_argument("-o", "--output", default="output_pvc.json", help="arquivo JSON de saída")
+    parser.add_argument("--solver", choices=SOLVERS, default="dense", help="método de solução do sistema")
+    parser.add_argument("--nested", action="store_true",
+                        help="partida a partir de soluções em grades mais grossas (métodos iterativos)")
+    parser.add_argument("--compare-cold-start", action="store_true",
+                        help="com --nested, resolve também partindo do zero para medir as iterações economizadas")
+    parser.add_argument("--scenarios", default=None,
+                        help="arquivo com vários cenários de temperaturas prescritas; gera um arquivo por cenário")
+    parser.add_argument("--transient", choices=tuple(SCHEMES), default=None,
+                        help="resolve o problema transiente com o esquema indicado")
+    parser.add_argument("--dt", type=float, default=0.1, help="passo de tempo do transiente")
+    parser.add_argument("--steps", type=int, default=1000, help="número de passos do transiente")
+    parser.add_argument("--stride", type=int, default=10, help="passos entre instantâneos do transiente")
+    parser.add_argument("--snapshot-file", default="transient_pvc.npy",
+                        help="arquivo .npy com os instantâneos do transiente")
+    parser.add_argument("--checkpoint", default=None, help="arquivo de checkpoint do transiente")
+    parser.add_argument("--checkpoint-every", type=int, default=100, help="passos entre checkpoints do transiente")
+    parser.add_argument("--resume", action="store_true",
+                        help="continua o transiente do checkpoint (checkpoint_pvc.npz se --checkpoint for omitido)")
+    arguments = parser.parse_args(argv)
+    if arguments.nested and arguments.solver not in NESTED_SOLVERS:
+        parser.error(f"--nested requer um solver iterativo ({', '.join(NESTED_SOLVERS)}), não {arguments.solver}")
+    if arguments.compare_cold_start and not arguments.nested:
+        parser.error("--compare-cold-start só tem efeito com --nested")
+    if (arguments.checkpoint is not None or arguments.resume) and arguments.transient is None:
+        parser.error("--checkpoint e --resume só têm efeito com --transient")
+    if arguments.resume and arguments.checkpoint is None:
+        arguments.checkpoint = "checkpoint_pvc.npz"
+    return arguments
+
+
+def main(argv=None):
+    arguments = parse_arguments(argv)
+    solver = arguments.solver
+    output_file = arguments.output
+
+    connections, temperatures, n_rows, n_columns = read_json(arguments.input)
 
-    calculated_temperatures = solve_temperatures(connections, temperatures)
+    if arguments.transient is not None:
+        final_temperatures, substeps = solve_transient_temperatures(connections, temperatures, arguments.dt,
+                                                                    arguments.steps, scheme=arguments.transient,
+                                                                    stride=arguments.stride,
+                                                                    snapshot_file=arguments.snapshot_file,
+                                                                    checkpoint_file=arguments.checkpoint,
+                                                                    checkpoint_every=arguments.checkpoint_every,
+                                                                    resume=arguments.resume)
+        if substeps > 1:
+            print(f"{arguments.transient}: passo dividido em {substeps} subpassos para respeitar o limite de "
+                  f"estabilidade")
+        save_into_json_file(to_plate_field(final_temperatures, connections, n_rows, n_columns), n_rows, n_columns,
+                            output_file)
+        return
 
-    save_into_json_file(np.reshape(calculated_temperatures, (n_rows, n_columns)), n_rows, n_columns)
+    if arguments.scenarios is not None:
+        # Vários cenários de temperaturas prescritas: uma fatoração, um arquivo de saída por cenário
+        base_name = output_file[:-5] if output_file.endswith(".json") else output_file
+        scenario_names, scenarios = read_scenarios(arguments.scenarios)
+        for name, result in zip(scenario_names, solve_temperature_scenarios(connections, scenarios)):
+            save_into_json_file(to_plate_field(result, connections, n_rows, n_columns), n_rows, n_columns,
+                                f"{base_name}_{name}.json")
+        return
+
+    solver_stats = {}
+    calculated_temperatures = solve_temperatures(connections, temperatures, solver, n_rows, n_columns, solver_stats,
+                                                 nested=arguments.nested,
+                                                 compare_cold_start=arguments.compare_cold_start)
+    if "bandwidth" in solver_stats:
+        print(f"{solver}: largura de banda {solver_stats['bandwidth']}" + (" (após RCM)" if solver_stats["reordered"] else ""))
+    elif "capacitance_points" in solver_stats:
+        print(f"{solver}: {solver_stats['capacitance_points']} pontos na correção de capacitância, "
+              f"resíduo relativo final {solver_stats['residuals'][-1]:.3e}")
+    elif solver_stats:
+        print(f"{solver}: {solver_stats['iterations']} iterações, resíduo relativo final {solver_stats['residuals'][-1]:.3e}")
+        if solver.startswith("multigrid"):
+            for cycle, reduction in enumerate(solver_stats["reductions"], start=1):
+                print(f"  ciclo {cycle}: redução do resíduo {reduction:.3f}")
+        if "nested" in solver_stats:
+            report = solver_stats["nested"]
+            for shape, iterations in report["levels"]:
+                print(f"  nível {shape[0]}x{shape[1]}: {iterations} iterações")
+            if "cold_start_iterations" in report:
+                print(f"  partida a frio: {report['cold_start_iterations']} iterações, "
+                      f"economia de {report['iterations_saved']:.1f} iterações equivalentes na grade fina")
+
+    save_into_json_file(to_plate_field(calculated_temperatures, connections, n_rows, n_columns), n_rows, n_columns,
+                        output_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import sys
+import time
+
+import numpy as np
+
+from pvc import assemble_triplets, assemble_triplets_loop
+from pvc_sparse import build_sparse_matrix
+
+
+def build_plate(rows, columns, top_temperature=100.0, border_temperature=0.0):
+    # Gera uma placa retangular no mesmo formato exportado por MyCanvas.export_pvc_data:
+    # pontos numerados por linha, conexões [n_vizinhos, esquerda, direita, cima, baixo] e
+    # temperaturas [prescrita?, valor] com a borda superior quente e as demais frias.
+    index = np.zeros((rows + 2, columns + 2), dtype=np.int64)
+    index[1:-1, 1:-1] = np.arange(1, rows * columns + 1).reshape(rows, columns)
+
+    neighbours = np.stack((index[1:-1, :-2], index[1:-1, 2:], index[:-2, 1:-1], index[2:, 1:-1]), axis=-1)
+    neighbours = neighbours.reshape(-1, 4)
+    connections = np.column_stack(((neighbours != 0).sum(axis=1), neighbours))
+
+    border = np.ones((rows, columns), dtype=bool)
+    border[1:-1, 1:-1] = False
+    values = np.full((rows, columns), border_temperature)
+    values[0, :] = top_temperature
+
+    temperatures = np.column_stack((border.ravel().astype(np.float64), np.where(border, values, 0.0).ravel()))
+    return connections, temperatures
+
+
+def compare_assembly_timings(sizes=(10_000, 100_000, 1_000_000)):
+    # Compara a montagem vetorizada com o laço original em placas quadradas de tamanho crescente
+    print(f"{'nós':>10} {'laço (s)':>10} {'vetorizada (s)':>15} {'ganho':>8}")
+    for size in sizes:
+        side = int(round(np.sqrt(size)))
+        connections, temperatures = build_plate(side, side)
+        nn = len(temperatures)
+
+        start = time.perf_counter()
+        loop_triplets = assemble_triplets_loop(connections, temperatures)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        triplets = assemble_triplets(connections, temperatures)
+        vectorized_time = time.perf_counter() - start
+
+        # As duas montagens devem gerar exatamente o mesmo operador. Com um vetor de inteiros
+        # os produtos são exatos, independente da ordem das entradas.
+        A_loop = build_sparse_matrix(*loop_triplets[:3], nn)
+        A = build_sparse_matrix(*triplets[:3], nn)
+        x = np.random.default_rng(0).integers(-1000, 1000, nn).astype(np.float64)
+        if not np.array_equal(A_loop @ x, A @ x) or not np.array_equal(loop_triplets[3], triplets[3]):
+            raise AssertionError(f"Montagens diferentes para {nn} nós")
+
+        print(f"{nn:>10} {loop_time:>10.3f} {vectorized_time:>15.4f} {loop_time / vectorized_time:>7.0f}x")
+
+
+if __name__ == '__main__':
+    # Uso: python pvc_benchmark.py [tamanho1 tamanho2 ...]
+    if len(sys.argv) > 1:
+        compare_assembly_timings([int(size) for size in sys.argv[1:]])
+    else:
+        compare_assembly_timings()
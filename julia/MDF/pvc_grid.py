@@ -0,0 +1,599 @@
+from collections import deque
+
+import numpy as np
+
+from pvc_sparse import Factorization, build_sparse_matrix, conjugate_gradient
+
+# Deslocamento (linha, coluna) de cada direção do connect: esquerda, direita, cima, baixo
+DIRECTIONS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
+def grid_layout(connections, rows, columns):
+    # Recupera a posição (linha, coluna) de cada ponto na grade. Quando a placa ocupa o retângulo
+    # inteiro os pontos estão numerados por linha; caso contrário as posições são obtidas percorrendo
+    # as conexões a partir de cada ponto ainda não visitado.
+    connections = np.asarray(connections)
+    nn = len(connections)
+
+    if nn == rows * columns:
+        node_rows, node_cols = np.divmod(np.arange(nn), columns)
+    else:
+        node_rows, node_cols = _layout_from_directions(connections)
+
+    _check_layout(connections, node_rows, node_cols)
+    return node_rows, node_cols
+
+
+def _layout_from_directions(connections):
+    nn = len(connections)
+    node_rows = np.zeros(nn, dtype=np.int64)
+    node_cols = np.zeros(nn, dtype=np.int64)
+    visited = np.zeros(nn, dtype=bool)
+    column_offset = 0
+
+    for start in range(nn):
+        if visited[start]:
+            continue
+
+        # Percorre a componente conexa que contém o ponto inicial
+        component = [start]
+        visited[start] = True
+        queue = deque([start])
+        while queue:
+            e = queue.popleft()
+            for (d_row, d_col), k in zip(DIRECTIONS, connections[e][1:5]):
+                if k == 0 or visited[k - 1]:
+                    continue
+                visited[k - 1] = True
+                node_rows[k - 1] = node_rows[e] + d_row
+                node_cols[k - 1] = node_cols[e] + d_col
+                component.append(k - 1)
+                queue.append(k - 1)
+
+        # Componentes desconexas não interagem, então são colocadas lado a lado
+        component = np.array(component)
+        node_rows[component] -= node_rows[component].min()
+        node_cols[component] -= node_cols[component].min() - column_offset
+        column_offset = node_cols[component].max() + 2
+
+    return node_rows, node_cols
+
+
+def _check_layout(connections, node_rows, node_cols):
+    nn = len(connections)
+    index = np.zeros((node_rows.max() + 3, node_cols.max() + 3), dtype=np.int64)
+    index[node_rows + 1, node_cols + 1] = np.arange(1, nn + 1)
+    if np.count_nonzero(index) != nn:
+        raise ValueError("Dois pontos ocupam a mesma posição da grade")
+
+    grid_neighbours = np.column_stack([index[node_rows + 1 + d_row, node_cols + 1 + d_col] for d_row, d_col in DIRECTIONS])
+    if not np.array_equal(np.sort(grid_neighbours, axis=1), np.sort(np.asarray(connections)[:, 1:5], axis=1)):
+        raise ValueError("As conexões não correspondem a uma grade regular de 5 pontos")
+
+
+def coarse_index(n):
+    # Índices pares de 0 a n - 1, mais o último índice quando ele é ímpar
+    return np.unique(np.r_[0:n:2, n - 1])
+
+
+def _interpolation_weights(index, n):
+    # Para cada índice fino, os dois índices grossos vizinhos e o peso do da direita na interpolação linear
+    right = np.clip(np.searchsorted(index, np.arange(n)), 1, len(index) - 1)
+    left = right - 1
+    weight = (np.arange(n) - index[left]) / (index[right] - index[left])
+    return left, right, weight
+
+
+class PlateGrid:
+    """Placa representada como uma grade 2-D mascarada, sem montar a matriz do sistema."""
+
+    def __init__(self, active, fixed, values, node_rows=None, node_cols=None):
+        self.shape = active.shape
+        self.active = active
+        self.fixed = fixed & active
+        self.free = active & ~fixed
+        self.values = np.where(self.fixed, values, 0.0)
+
+        # Posição de cada ponto do connect na grade; por padrão, os pontos ativos em ordem de linha
+        if node_rows is None:
+            node_rows, node_cols = np.nonzero(active)
+        self.node_rows, self.node_cols = node_rows, node_cols
+
+    @classmethod
+    def from_connect(cls, connections, temperatures, rows, columns):
+        node_rows, node_cols = grid_layout(connections, rows, columns)
+        shape = (max(rows, node_rows.max() + 1), max(columns, node_cols.max() + 1))
+
+        active = np.zeros(shape, dtype=bool)
+        active[node_rows, node_cols] = True
+        fixed = np.zeros(shape, dtype=bool)
+        fixed[node_rows, node_cols] = temperatures[:, 0] == 1
+        values = np.zeros(shape)
+        values[node_rows, node_cols] = temperatures[:, 1]
+
+        return cls(active, fixed, values, node_rows, node_cols)
+
+    def coarsened(self):
+        # Placa com metade dos pontos em cada direção, para a iteração aninhada: os índices pares e sempre a
+        # última linha e a última coluna, que costumam ser borda prescrita e se perderiam com [::2] quando a
+        # dimensão é par. `coarse_rows`/`coarse_cols` guardam a posição de cada linha/coluna na grade fina.
+        rows, cols = coarse_index(self.shape[0]), coarse_index(self.shape[1])
+        pick = np.ix_(rows, cols)
+        coarse = PlateGrid(self.active[pick].copy(), self.fixed[pick].copy(), self.values[pick].copy())
+        coarse.coarse_rows, coarse.coarse_cols = rows, cols
+        return coarse
+
+    def to_connect(self):
+        # Conexões e temperaturas no formato de MyCanvas.export_pvc_data, na ordem dos pontos
+        n = len(self.node_rows)
+        index = np.zeros((self.shape[0] + 2, self.shape[1] + 2), dtype=np.int64)
+        index[self.node_rows + 1, self.node_cols + 1] = np.arange(1, n + 1)
+        neighbours = np.column_stack([index[self.node_rows + 1 + d_row, self.node_cols + 1 + d_col] for d_row, d_col in DIRECTIONS])
+        connections = np.column_stack(((neighbours != 0).sum(axis=1), neighbours))
+
+        fixed = self.fixed[self.node_rows, self.node_cols]
+        temperatures = np.column_stack((fixed.astype(np.float64), self.values[self.node_rows, self.node_cols]))
+        return connections, temperatures
+
+    def to_field(self, x):
+        field = np.zeros(self.shape)
+        field[self.node_rows, self.node_cols] = np.ravel(x)
+        return field
+
+    def to_nodes(self, field):
+        return field[self.node_rows, self.node_cols].reshape(-1, 1)
+
+
+def neighbour_sum(padded, out):
+    # Soma dos quatro vizinhos de cada ponto; `padded` tem uma borda de zeros ao redor da grade,
+    # o que equivale às conexões ausentes (0) do connect
+    np.add(padded[:-2, 1:-1], padded[2:, 1:-1], out=out)
+    out += padded[1:-1, :-2]
+    out += padded[1:-1, 2:]
+    return out
+
+
+def residual_norm(padded, free, work):
+    # Norma do resíduo (soma dos vizinhos - 4 * Ti) nos pontos de temperatura desconhecida
+    neighbour_sum(padded, work)
+    work -= 4.0 * padded[1:-1, 1:-1]
+    np.square(work, out=work)
+    return np.sqrt(np.sum(work, where=free))
+
+
+def optimal_omega(shape):
+    # Fator de relaxação ótimo do SOR para a grade retangular que envolve a placa,
+    # a partir do raio espectral da iteração de Jacobi
+    rho = 0.5 * (np.cos(np.pi / (shape[0] + 1)) + np.cos(np.pi / (shape[1] + 1)))
+    return 2.0 / (1.0 + np.sqrt(1.0 - rho * rho))
+
+
+def relaxation_solve(grid, method="sor", omega=None, tol=1e-8, max_iterations=100_000, initial=None):
+    """Resolve a equação de Laplace na grade mascarada por SOR vermelho-preto ou por Jacobi.
+
+    Retorna o campo de temperaturas (2-D) e a norma relativa do resíduo a cada iteração,
+    começando pelo resíduo da aproximação inicial.
+    """
+    if method not in ("sor", "jacobi"):
+        raise ValueError(f"Método de relaxação desconhecido: {method}")
+    if omega is None:
+        omega = optimal_omega(grid.shape) if method == "sor" else 1.0
+
+    padded = np.zeros((grid.shape[0] + 2, grid.shape[1] + 2))
+    u = padded[1:-1, 1:-1]
+    work = np.empty(grid.shape)
+
+    # Norma do lado direito: resíduo com apenas as temperaturas prescritas na grade
+    u[grid.fixed] = grid.values[grid.fixed]
+    b_norm = residual_norm(padded, grid.free, work)
+    if b_norm == 0.0:
+        return u.copy(), [0.0]
+
+    if initial is not None:
+        u[grid.free] = initial[grid.free]
+
+    if method == "sor":
+        i, j = np.indices(grid.shape)
+        sweeps = [grid.free & ((i + j) % 2 == 0), grid.free & ((i + j) % 2 == 1)]
+    else:
+        sweeps = [grid.free]
+
+    residuals = [residual_norm(padded, grid.free, work) / b_norm]
+    for _ in range(max_iterations):
+        if residuals[-1] <= tol:
+            break
+        for points in sweeps:
+            # Ti <- Ti + omega * (soma dos vizinhos / 4 - Ti)
+            neighbour_sum(padded, work)
+            work *= 0.25
+            work -= u
+            work *= omega
+            np.add(u, work, out=u, where=points)
+
+        residuals.append(residual_norm(padded, grid.free, work) / b_norm)
+
+    return u.copy(), residuals
+
+
+# Deslocamentos do estêncil de 9 pontos dos níveis grossos, na ordem do array (3, 3, linhas, colunas)
+STENCIL_OFFSETS = tuple((d_row, d_col) for d_row in (-1, 0, 1) for d_col in (-1, 0, 1))
+
+
+class _MultigridLevel:
+    # Um nível da hierarquia: o estêncil do operador (4 * ei - soma dos vizinhos no nível fino),
+    # a correção, o resíduo e o lado direito. Pontos fora de `free` são Dirichlet homogêneos.
+
+    def __init__(self, free, stencil):
+        self.free = free
+        self.shape = free.shape
+        self.stencil = stencil
+        self.diagonal = np.where(free, stencil[1, 1], 1.0)
+        self.offsets = [(d_row, d_col) for d_row, d_col in STENCIL_OFFSETS if stencil[d_row + 1, d_col + 1].any()]
+
+        # Estêncil de 5 pontos permite Gauss-Seidel vermelho-preto; o de 9 pontos precisa de 4 cores
+        i, j = np.indices(self.shape)
+        if any(d_row != 0 and d_col != 0 for d_row, d_col in self.offsets):
+            self.colours = [free & (i % 2 == a) & (j % 2 == b) for a in (0, 1) for b in (0, 1)]
+        else:
+            self.colours = [free & ((i + j) % 2 == 0), free & ((i + j) % 2 == 1)]
+
+        self.padded = np.zeros((self.shape[0] + 2, self.shape[1] + 2))
+        self.e = self.padded[1:-1, 1:-1]
+        self.residual_padded = np.zeros_like(self.padded)
+        self.residual = self.residual_padded[1:-1, 1:-1]
+        self.rhs = np.zeros(self.shape)
+        self.work = np.empty(self.shape)
+        self.product = np.empty(self.shape)
+        self.coarse_solver = None
+
+    def apply(self, out):
+        # out = A e, aplicando o estêncil sobre a correção com borda de zeros
+        rows, columns = self.shape
+        out.fill(0.0)
+        for d_row, d_col in self.offsets:
+            np.multiply(self.stencil[d_row + 1, d_col + 1],
+                        self.padded[1 + d_row:1 + d_row + rows, 1 + d_col:1 + d_col + columns], out=self.product)
+            out += self.product
+        return out
+
+
+def _laplace_stencil(free):
+    stencil = np.zeros((3, 3) + free.shape)
+    stencil[1, 1] = 4.0
+    for d_row, d_col in DIRECTIONS:
+        stencil[d_row + 1, d_col + 1] = -1.0
+    stencil *= free
+    return stencil
+
+
+def _restrict(residual_padded, coarse_shape):
+    # Transposta da interpolação bilinear: cada ponto grosso c recolhe os pontos finos em torno de 2c + 1
+    rows, columns = coarse_shape
+    rhs = np.zeros(coarse_shape)
+    for d_row, w_row in ((-1, 0.5), (0, 1.0), (1, 0.5)):
+        for d_col, w_col in ((-1, 0.5), (0, 1.0), (1, 0.5)):
+            rhs += (w_row * w_col) * residual_padded[2 + d_row:2 + d_row + 2 * rows:2, 2 + d_col:2 + d_col + 2 * columns:2]
+    return rhs
+
+
+def _prolong(coarse_padded, fine_shape):
+    # Interpolação bilinear da correção grossa (com a borda de zeros) para a grade fina
+    ep = coarse_padded
+    interpolated = np.zeros((2 * ep.shape[0] - 1, 2 * ep.shape[1] - 1))
+    interpolated[::2, ::2] = ep
+    interpolated[1::2, ::2] = 0.5 * (ep[:-1] + ep[1:])
+    interpolated[:, 1::2] = 0.5 * (interpolated[:, :-1:2] + interpolated[:, 2::2])
+    return interpolated[1:fine_shape[0] + 1, 1:fine_shape[1] + 1]
+
+
+def _galerkin_stencil(fine, coarse_free):
+    # Operador grosso de Galerkin (Pᵀ A P), obtido aplicando P, A e Pᵀ a 9 vetores de teste:
+    # cada vetor marca os pontos grossos com a mesma cor (i % 3, j % 3), de modo que cada vizinho
+    # de um ponto grosso contribui em um único teste
+    rows, columns = coarse_free.shape
+    i, j = np.indices(coarse_free.shape)
+    stencil = np.zeros((3, 3, rows, columns))
+    probe = np.zeros((rows + 2, columns + 2))
+
+    for a in range(3):
+        for b in range(3):
+            probe[1:-1, 1:-1] = coarse_free & (i % 3 == a) & (j % 3 == b)
+            fine.e[...] = np.where(fine.free, _prolong(probe, fine.shape), 0.0)
+            fine.apply(fine.residual)
+            fine.residual[~fine.free] = 0.0
+            response = _restrict(fine.residual_padded, coarse_free.shape)
+
+            d_row = (a - i + 1) % 3 - 1
+            d_col = (b - j + 1) % 3 - 1
+            stencil[d_row + 1, d_col + 1, i, j] = response
+
+    fine.e.fill(0.0)
+    stencil *= coarse_free
+    return stencil
+
+
+# Número de pontos livres até o qual o nível mais grosso é resolvido com a inversa densa
+COARSEST_SIZE = 1000
+
+
+def _build_levels(free, coarsest_size=COARSEST_SIZE):
+    # Engrossa a grade tomando os pontos ímpares (2c + 1) de cada direção; um ponto grosso é livre
+    # quando o ponto fino correspondente é livre. O operador de Galerkin mantém a máscara irregular
+    # e os pontos prescritos consistentes em todos os níveis.
+    levels = [_MultigridLevel(free, _laplace_stencil(free))]
+    while np.count_nonzero(levels[-1].free) > coarsest_size and min(levels[-1].shape) >= 3:
+        coarse_free = levels[-1].free[1::2, 1::2].copy()
+        if not coarse_free.any():
+            break
+        levels.append(_MultigridLevel(coarse_free, _galerkin_stencil(levels[-1], coarse_free)))
+    return levels
+
+
+def _smooth(level, sweeps):
+    # Gauss-Seidel por cores: ei <- ei + (ri - (A e)i) / Aii
+    for _ in range(sweeps):
+        for points in level.colours:
+            level.apply(level.work)
+            np.subtract(level.rhs, level.work, out=level.work)
+            level.work /= level.diagonal
+            np.add(level.e, level.work, out=level.e, where=points)
+
+
+def _compute_residual(level):
+    level.apply(level.residual)
+    np.subtract(level.rhs, level.residual, out=level.residual)
+    level.residual[~level.free] = 0.0
+
+
+def _coarse_solve(level, dense_size=COARSEST_SIZE):
+    # O nível mais grosso é resolvido diretamente. Normalmente ele tem no máximo `dense_size` pontos e
+    # usa a inversa densa; placas estreitas param de engrossar com o lado curto ainda com muitos pontos,
+    # e nesse caso o operador (simétrico positivo definido) é fatorado como matriz esparsa.
+    if level.coarse_solver is None:
+        m = np.count_nonzero(level.free)
+        index = np.full((level.shape[0] + 2, level.shape[1] + 2), -1, dtype=np.int64)
+        index[1:-1, 1:-1][level.free] = np.arange(m)
+        positions = np.argwhere(level.free)
+        rows, cols, vals = [], [], []
+        for d_row, d_col in level.offsets:
+            neighbour = index[positions[:, 0] + 1 + d_row, positions[:, 1] + 1 + d_col]
+            connected = neighbour >= 0
+            rows.append(np.flatnonzero(connected))
+            cols.append(neighbour[connected])
+            vals.append(level.stencil[d_row + 1, d_col + 1][level.free][connected])
+        rows, cols, vals = np.concatenate(rows), np.concatenate(cols), np.concatenate(vals)
+
+        if m <= dense_size:
+            A = np.zeros((m, m))
+            A[rows, cols] = vals
+            inverse = np.linalg.inv(A)
+            level.coarse_solver = lambda b: inverse @ b
+        else:
+            level.coarse_solver = Factorization(build_sparse_matrix(rows, cols, vals, m), symmetric=True).solve
+
+    level.e.fill(0.0)
+    level.e[level.free] = level.coarse_solver(level.rhs[level.free])
+
+
+def _cycle(levels, depth, kind, pre_smoothing, post_smoothing, zero_start=True):
+    level = levels[depth]
+    if depth == len(levels) - 1:
+        _coarse_solve(level)
+        return
+
+    if zero_start:
+        level.e.fill(0.0)
+    _smooth(level, pre_smoothing)
+    _compute_residual(level)
+
+    coarse = levels[depth + 1]
+    coarse.rhs[...] = _restrict(level.residual_padded, coarse.shape)
+    coarse.rhs[~coarse.free] = 0.0
+    _cycle(levels, depth + 1, kind, pre_smoothing, post_smoothing)
+    if kind == "F":
+        # Ciclo F: depois do ciclo F no nível grosso, mais um ciclo V partindo da correção obtida
+        _cycle(levels, depth + 1, "V", pre_smoothing, post_smoothing, zero_start=False)
+
+    np.add(level.e, _prolong(coarse.padded, level.shape), out=level.e, where=level.free)
+    _smooth(level, post_smoothing)
+
+
+def multigrid_solve(grid, cycle="V", tol=1e-8, max_cycles=100, pre_smoothing=2, post_smoothing=2, initial=None):
+    """Resolve a equação de Laplace na grade mascarada por multigrid geométrico (ciclos V ou F).
+
+    Retorna o campo de temperaturas (2-D) e a norma relativa do resíduo após cada ciclo,
+    começando pelo resíduo da aproximação inicial.
+    """
+    if cycle not in ("V", "F"):
+        raise ValueError(f"Ciclo de multigrid desconhecido: {cycle}")
+
+    padded = np.zeros((grid.shape[0] + 2, grid.shape[1] + 2))
+    u = padded[1:-1, 1:-1]
+    work = np.empty(grid.shape)
+
+    u[grid.fixed] = grid.values[grid.fixed]
+    b_norm = residual_norm(padded, grid.free, work)
+    if b_norm == 0.0:
+        return u.copy(), [0.0]
+
+    if initial is not None:
+        u[grid.free] = initial[grid.free]
+
+    levels = _build_levels(grid.free)
+    finest = levels[0]
+
+    residuals = []
+    for _ in range(max_cycles + 1):
+        # O ciclo resolve a equação da correção, cujo lado direito é o resíduo atual
+        neighbour_sum(padded, finest.rhs)
+        finest.rhs -= 4.0 * u
+        finest.rhs[~grid.free] = 0.0
+        residuals.append(np.linalg.norm(finest.rhs) / b_norm)
+        if residuals[-1] <= tol or len(residuals) > max_cycles:
+            break
+
+        _cycle(levels, 0, cycle, pre_smoothing, post_smoothing)
+        np.add(u, finest.e, out=u, where=grid.free)
+
+    return u.copy(), residuals
+
+
+def _dst1(a, axis):
+    # Transformada seno discreta do tipo I ao longo de um eixo, pela FFT da extensão ímpar
+    a = np.moveaxis(a, axis, -1)
+    n = a.shape[-1]
+    extended = np.zeros(a.shape[:-1] + (2 * (n + 1),))
+    extended[..., 1:n + 1] = a
+    extended[..., n + 2:] = -a[..., ::-1]
+    transformed = -0.5 * np.fft.rfft(extended, axis=-1).imag[..., 1:n + 1]
+    return np.moveaxis(transformed, -1, axis)
+
+
+class _BoxPoissonSolver:
+    # Resolve (4 * ui - soma dos vizinhos) = fi num retângulo com zeros em volta: a DST-I nas duas
+    # direções diagonaliza o operador, com autovalores 4 - 2 cos(pi j / (R + 1)) - 2 cos(pi k / (C + 1))
+
+    def __init__(self, shape):
+        rows, columns = shape
+        theta_rows = np.pi * np.arange(1, rows + 1) / (rows + 1)
+        theta_columns = np.pi * np.arange(1, columns + 1) / (columns + 1)
+        self.eigenvalues = 4.0 - 2.0 * np.cos(theta_rows)[:, None] - 2.0 * np.cos(theta_columns)[None, :]
+        # A DST-I é a própria inversa a menos do fator 2 / (N + 1) em cada direção
+        self.scale = 4.0 / ((rows + 1) * (columns + 1))
+
+    def solve(self, f):
+        # Aceita um campo (R, C) ou um lote (k, R, C)
+        transformed = _dst1(_dst1(f, -2), -1) / self.eigenvalues
+        return self.scale * _dst1(_dst1(transformed, -2), -1)
+
+
+class _CapacitanceOperator:
+    # Matriz de capacitância E^T L^-1 E aplicada sem ser montada: cada produto é uma solução rápida
+
+    def __init__(self, solver, holes, shape):
+        self.solver = solver
+        self.holes = holes
+        self.shape = shape
+
+    def __matmul__(self, c):
+        charges = np.zeros(self.shape)
+        charges[self.holes] = c
+        return self.solver.solve(charges)[self.holes]
+
+    def diagonal(self):
+        # A diagonal de L^-1 é quase constante; o gradiente conjugado fica sem pré-condicionador
+        return np.ones(len(self.holes[0]))
+
+
+def fast_poisson_solve(grid, max_capacitance=50, tol=1e-12):
+    """Resolve a equação de Laplace na placa com a transformada seno (DST) via numpy.fft.
+
+    Os pontos livres são envolvidos pelo menor retângulo que os contém. Se o retângulo todo é livre
+    (placa retangular com a borda prescrita) basta uma solução rápida, O(n log n). Caso contrário os
+    pontos do retângulo que não são livres mas são vizinhos de pontos livres recebem cargas,
+    determinadas pela matriz de capacitância, que anulam a solução nesses pontos. Retorna o campo de
+    temperaturas (2-D), o resíduo relativo inicial e final, e o número de pontos da correção de
+    capacitância.
+    """
+    padded = np.zeros((grid.shape[0] + 2, grid.shape[1] + 2))
+    u = padded[1:-1, 1:-1]
+    work = np.empty(grid.shape)
+
+    # Lado direito: soma das temperaturas prescritas vizinhas de cada ponto livre
+    u[grid.fixed] = grid.values[grid.fixed]
+    rhs = neighbour_sum(padded, np.empty(grid.shape))
+    b_norm = np.linalg.norm(rhs[grid.free])
+    if b_norm == 0.0:
+        return u.copy(), [0.0], 0
+
+    free_rows = np.flatnonzero(grid.free.any(axis=1))
+    free_cols = np.flatnonzero(grid.free.any(axis=0))
+    box = (slice(free_rows[0], free_rows[-1] + 1), slice(free_cols[0], free_cols[-1] + 1))
+    box_free = grid.free[box]
+
+    solver = _BoxPoissonSolver(box_free.shape)
+    f = np.where(box_free, rhs[box], 0.0)
+    w = solver.solve(f)
+
+    # Só os pontos não livres vizinhos de um ponto livre entram nas equações dos pontos livres; anular a
+    # solução neles basta, e os pontos mais afastados dos buracos e de fora da placa ficam sem carga
+    near_free = box_free.copy()
+    near_free[1:] |= box_free[:-1]
+    near_free[:-1] |= box_free[1:]
+    near_free[:, 1:] |= box_free[:, :-1]
+    near_free[:, :-1] |= box_free[:, 1:]
+    holes = np.nonzero(near_free & ~box_free)
+    n_holes = len(holes[0])
+    if n_holes > 0:
+        # Cargas c nos pontos não livres tais que L^-1 (f + E c) se anula nesses pontos:
+        # (E^T L^-1 E) c = -E^T L^-1 f
+        if n_holes <= max_capacitance:
+            capacitance = np.empty((n_holes, n_holes))
+            batch = max(1, 4_000_000 // box_free.size)
+            for start in range(0, n_holes, batch):
+                stop = min(start + batch, n_holes)
+                charges = np.zeros((stop - start,) + box_free.shape)
+                charges[np.arange(stop - start), holes[0][start:stop], holes[1][start:stop]] = 1.0
+                capacitance[:, start:stop] = solver.solve(charges)[:, holes[0], holes[1]].T
+            c = np.linalg.solve(capacitance, -w[holes])
+        else:
+            c, _ = conjugate_gradient(_CapacitanceOperator(solver, holes, box_free.shape), -w[holes], tol=tol)
+
+        charges = np.zeros(box_free.shape)
+        charges[holes] = c
+        w += solver.solve(charges)
+
+    u[box][box_free] = w[box_free]
+    return u.copy(), [1.0, float(residual_norm(padded, grid.free, work) / b_norm)], n_holes
+
+
+def _interpolate_from_coarse(coarse, coarse_field, fine_shape):
+    # Interpolação bilinear dos pontos mantidos em coarsened() para a grade fina, ponderada pelos pontos
+    # ativos da grade grossa para que buracos e regiões fora da placa não puxem a temperatura para zero
+    (top, bottom, w_rows), (left, right, w_cols) = (
+        _interpolation_weights(coarse.coarse_rows, fine_shape[0]),
+        _interpolation_weights(coarse.coarse_cols, fine_shape[1]))
+
+    def expand(a):
+        a = (1 - w_rows)[:, None] * a[top] + w_rows[:, None] * a[bottom]
+        return (1 - w_cols) * a[:, left] + w_cols * a[:, right]
+
+    weight = coarse.active.astype(np.float64)
+    numerator = expand(coarse_field * weight)
+    denominator = expand(weight)
+    return np.divide(numerator, denominator, out=np.zeros(fine_shape), where=denominator > 1e-12)
+
+
+def nested_iteration_solve(grid, backend, initial=None, min_size=8, tol=None, coarse_tol=1e-4,
+                           compare_cold_start=False):
+    """Iteração aninhada: resolve em versões engrossadas da placa e usa cada solução, interpolada,
+    como aproximação inicial do nível seguinte, até a grade original.
+
+    `backend(grid, initial, tol)` é qualquer solver iterativo que retorne (campo, resíduos). Os níveis
+    grossos só servem de aproximação inicial e param na tolerância `coarse_tol`; na grade fina vale `tol`
+    ou, com tol=None, a tolerância padrão do backend, a mesma da solução sem iteração aninhada. Retorna o
+    campo, os resíduos da grade fina e um dicionário com as iterações de cada nível e, se
+    `compare_cold_start`, as iterações economizadas em relação a partir do zero na grade fina (níveis
+    grossos contados pelo custo relativo, 1/4 por nível).
+    """
+    grids = [grid]
+    if initial is None:
+        while min(grids[-1].shape) >= 2 * min_size:
+            grids.append(grids[-1].coarsened())
+
+    levels = []
+    work = 0.0
+    for depth in range(len(grids) - 1, -1, -1):
+        field, residuals = backend(grids[depth], initial, tol if depth == 0 else coarse_tol)
+        levels.append((grids[depth].shape, len(residuals) - 1))
+        work += (len(residuals) - 1) / 4 ** depth
+        if depth > 0:
+            initial = _interpolate_from_coarse(grids[depth], field, grids[depth - 1].shape)
+
+    report = {"levels": levels, "fine_equivalent_iterations": work}
+    if compare_cold_start:
+        _, cold_residuals = backend(grid, None, tol)
+        report["cold_start_iterations"] = len(cold_residuals) - 1
+        report["iterations_saved"] = report["cold_start_iterations"] - work
+
+    return field, residuals, report
@@ -0,0 +1,287 @@
+from collections import deque
+
+import numpy as np
+
+try:
+    import scipy.linalg as sla
+    import scipy.sparse as sp
+    import scipy.sparse.csgraph as csgraph
+    import scipy.sparse.linalg as spla
+except ImportError:  # SciPy é opcional, sem ela usamos apenas NumPy
+    sla = None
+    sp = None
+    csgraph = None
+    spla = None
+
+
+def has_scipy():
+    return sp is not None
+
+
+class CsrMatrix:
+    """Matriz esparsa CSR mínima usada quando o SciPy não está instalado."""
+
+    def __init__(self, rows, cols, vals, shape):
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        vals = np.asarray(vals, dtype=np.float64)
+
+        # Ordena por (linha, coluna) e soma as entradas duplicadas, como faz o formato COO
+        order = np.lexsort((cols, rows))
+        rows, cols, vals = rows[order], cols[order], vals[order]
+        if len(rows) > 0:
+            new_entry = np.ones(len(rows), dtype=bool)
+            new_entry[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+            starts = np.flatnonzero(new_entry)
+            vals = np.add.reduceat(vals, starts)
+            rows, cols = rows[starts], cols[starts]
+
+        self.shape = shape
+        self.row = rows
+        self.indices = cols
+        self.data = vals
+        self.indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=shape[0]), out=self.indptr[1:])
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    def dot(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        if x.ndim == 1:
+            return np.bincount(self.row, weights=self.data * x[self.indices], minlength=self.shape[0])
+        return np.column_stack([self.dot(x[:, k]) for k in range(x.shape[1])])
+
+    def __matmul__(self, x):
+        return self.dot(x)
+
+    def diagonal(self):
+        diag = np.zeros(min(self.shape))
+        on_diag = self.row == self.indices
+        diag[self.row[on_diag]] = self.data[on_diag]
+        return diag
+
+    def toarray(self):
+        dense = np.zeros(self.shape)
+        dense[self.row, self.indices] = self.data
+        return dense
+
+
+def build_sparse_matrix(rows, cols, vals, n):
+    # Monta a matriz a partir das triplas (linha, coluna, valor); duplicatas são somadas
+    if has_scipy():
+        return sp.coo_matrix((vals, (rows, cols)), shape=(n, n)).tocsr()
+    return CsrMatrix(rows, cols, vals, (n, n))
+
+
+class Factorization:
+    """Fatoração reutilizável de uma matriz: LU esparsa (SuperLU) com SciPy, inversa densa sem ele."""
+
+    def __init__(self, A, symmetric=False):
+        if has_scipy():
+            # Para matrizes simétricas positivas definidas o pivoteamento pode ser desligado e a
+            # ordenação das colunas feita sobre o padrão simétrico, como numa fatoração de Cholesky
+            options = dict(permc_spec="MMD_AT_PLUS_A", diag_pivot_thresh=0.0, options=dict(SymmetricMode=True)) if symmetric else {}
+            self._lu = spla.splu(sp.csc_matrix(A), **options)
+            self._inverse = None
+        elif symmetric:
+            # Sem SciPy, matrizes simétricas positivas definidas usam a fatoração de Cholesky em banda
+            self._lu = BandedCholesky(A)
+            self._inverse = None
+        else:
+            # Sem SciPy não há fatoração esparsa; a inversa é calculada uma vez e cada solução
+            # vira um produto matriz-vetor. Só é viável para placas de tamanho moderado.
+            self._lu = None
+            self._inverse = np.linalg.inv(A.toarray())
+
+    def solve(self, b):
+        # Aceita um vetor ou uma matriz com um lado direito por coluna
+        b = np.asarray(b, dtype=np.float64)
+        x = self._lu.solve(b) if self._lu is not None else self._inverse @ b
+        return x.reshape(b.shape)
+
+
+def sparse_direct_solve(A, b):
+    # Fatoração LU esparsa (SuperLU) do SciPy
+    if not has_scipy():
+        raise RuntimeError("A solução direta esparsa requer o SciPy instalado")
+    return Factorization(A).solve(b)
+
+
+def matrix_triplets(A):
+    if isinstance(A, CsrMatrix):
+        return A.row, A.indices, A.data
+    coo = sp.coo_matrix(A)
+    return coo.row.astype(np.int64), coo.col.astype(np.int64), coo.data
+
+
+def bandwidth(rows, cols):
+    return int(np.max(np.abs(rows - cols))) if len(rows) > 0 else 0
+
+
+def reverse_cuthill_mckee(rows, cols, n):
+    # Reordenação reversa de Cuthill-McKee para reduzir a largura de banda de uma matriz simétrica
+    if has_scipy():
+        pattern = sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, n))
+        return np.asarray(csgraph.reverse_cuthill_mckee(pattern, symmetric_mode=True), dtype=np.int64)
+
+    order = np.lexsort((cols, rows))
+    neighbours = cols[order]
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    degree = np.diff(indptr)
+
+    visited = np.zeros(n, dtype=bool)
+    permutation = []
+    # Cada componente começa pelo ponto de menor grau e é percorrida em largura,
+    # visitando os vizinhos em ordem crescente de grau
+    for start in np.argsort(degree, kind="stable"):
+        if visited[start]:
+            continue
+        visited[start] = True
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            permutation.append(node)
+            adjacent = neighbours[indptr[node]:indptr[node + 1]]
+            adjacent = adjacent[~visited[adjacent]]
+            adjacent = adjacent[np.argsort(degree[adjacent], kind="stable")]
+            visited[adjacent] = True
+            queue.extend(adjacent)
+
+    return np.array(permutation[::-1], dtype=np.int64)
+
+
+class BandedCholesky:
+    """Fatoração de Cholesky de uma matriz simétrica positiva definida guardando apenas a banda.
+
+    Custa O(n * banda²) em vez de O(n³). Com SciPy usa a rotina em banda do LAPACK; sem ele a banda
+    é dividida em blocos de tamanho igual à largura de banda, formando uma matriz tridiagonal por
+    blocos que é fatorada bloco a bloco.
+    """
+
+    def __init__(self, A, reorder="auto"):
+        n = A.shape[0]
+        rows, cols, vals = matrix_triplets(A)
+
+        # Com reorder="auto" a reordenação RCM só é usada quando reduz a largura de banda
+        self.permutation = None
+        self.bandwidth = bandwidth(rows, cols)
+        if reorder:
+            permutation = reverse_cuthill_mckee(rows, cols, n)
+            position = np.empty(n, dtype=np.int64)
+            position[permutation] = np.arange(n)
+            reordered_bandwidth = bandwidth(position[rows], position[cols])
+            if reorder != "auto" or reordered_bandwidth < self.bandwidth:
+                self.permutation = permutation
+                self.bandwidth = reordered_bandwidth
+                rows, cols = position[rows], position[cols]
+
+        self.n = n
+        if has_scipy():
+            lower = rows >= cols
+            band = np.zeros((self.bandwidth + 1, n))
+            band[rows[lower] - cols[lower], cols[lower]] = vals[lower]
+            self._band = sla.cholesky_banded(band, lower=True)
+        else:
+            self._factorize_blocks(rows, cols, vals)
+
+    def _factorize_blocks(self, rows, cols, vals):
+        p = max(self.bandwidth, 1)
+        n_blocks = -(-self.n // p)
+        self.block_size = p
+
+        block_rows, block_cols = rows // p, cols // p
+        diagonal = np.zeros((n_blocks, p, p))
+        same = block_rows == block_cols
+        diagonal[block_rows[same], rows[same] % p, cols[same] % p] = vals[same]
+        below = block_rows == block_cols + 1
+        sub_diagonal = np.zeros((n_blocks, p, p))
+        sub_diagonal[block_rows[below], rows[below] % p, cols[below] % p] = vals[below]
+
+        # Completa o último bloco com a identidade
+        padding = np.arange(self.n, n_blocks * p)
+        diagonal[-1, padding % p, padding % p] = 1.0
+
+        # L[k, k-1] = A[k, k-1] L[k-1, k-1]^-T   e   L[k, k] = chol(A[k, k] - L[k, k-1] L[k, k-1]^T)
+        self._inverse_diagonal = np.empty((n_blocks, p, p))
+        self._sub_diagonal = sub_diagonal
+        for k in range(n_blocks):
+            block = diagonal[k]
+            if k > 0:
+                sub_diagonal[k] = sub_diagonal[k] @ self._inverse_diagonal[k - 1].T
+                block = block - sub_diagonal[k] @ sub_diagonal[k].T
+            self._inverse_diagonal[k] = np.linalg.inv(np.linalg.cholesky(block))
+
+    def _solve_blocks(self, b):
+        p = self.block_size
+        n_blocks = len(self._inverse_diagonal)
+        y = np.zeros((n_blocks * p,) + b.shape[1:])
+        y[:self.n] = b
+        y = y.reshape((n_blocks, p) + b.shape[1:])
+
+        # Substituição progressiva (L y = b) e regressiva (L^T x = y), bloco a bloco
+        for k in range(n_blocks):
+            if k > 0:
+                y[k] -= self._sub_diagonal[k] @ y[k - 1]
+            y[k] = self._inverse_diagonal[k] @ y[k]
+        for k in range(n_blocks - 1, -1, -1):
+            if k < n_blocks - 1:
+                y[k] -= self._sub_diagonal[k + 1].T @ y[k + 1]
+            y[k] = self._inverse_diagonal[k].T @ y[k]
+
+        return y.reshape((n_blocks * p,) + b.shape[1:])[:self.n]
+
+    def solve(self, b):
+        b = np.asarray(b, dtype=np.float64)
+        rhs = b[self.permutation] if self.permutation is not None else b
+        if has_scipy():
+            x = sla.cho_solve_banded((self._band, True), rhs)
+        else:
+            x = self._solve_blocks(rhs)
+        if self.permutation is not None:
+            solution = np.empty_like(x)
+            solution[self.permutation] = x
+            x = solution
+        return x.reshape(b.shape)
+
+
+def conjugate_gradient(A, b, x0=None, tol=1e-10, max_iterations=None):
+    """Gradiente conjugado com pré-condicionador de Jacobi para matrizes simétricas positivas definidas.
+
+    Retorna a solução e a lista com a norma relativa do resíduo a cada iteração.
+    """
+    b = np.asarray(b, dtype=np.float64).ravel()
+    n = len(b)
+    if max_iterations is None:
+        max_iterations = 10 * n
+
+    x = np.zeros(n) if x0 is None else np.array(x0, dtype=np.float64).ravel()
+    inv_diag = 1.0 / A.diagonal()
+
+    r = b - A @ x
+    b_norm = np.linalg.norm(b)
+    if b_norm == 0.0:
+        return np.zeros(n), [0.0]
+
+    z = inv_diag * r
+    p = z.copy()
+    rz = r @ z
+    residuals = [np.linalg.norm(r) / b_norm]
+
+    for _ in range(max_iterations):
+        if residuals[-1] <= tol:
+            break
+        Ap = A @ p
+        alpha = rz / (p @ Ap)
+        x += alpha * p
+        r -= alpha * Ap
+        residuals.append(np.linalg.norm(r) / b_norm)
+        z = inv_diag * r
+        rz_new = r @ z
+        p *= rz_new / rz
+        p += z
+        rz = rz_new
+
+    return x, residuals
@@ -0,0 +1,230 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Os scripts de MDF e DEM importam uns aos outros pelo nome, como quando executados das suas pastas
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MDF_DIR = os.path.join(ROOT, "MDF")
+DEM_DIR = os.path.join(ROOT, "DEM")
+sys.path[:0] = [MDF_DIR, DEM_DIR]
+
+from pvc import SOLVERS, read_json, solve_temperatures, to_plate_field
+from pvc_benchmark import build_plate
+from pvi import simulate, simulate_model
+from pvi_benchmark import build_particle_grid
+from pvi_kernels import available_backends
+
+# Número aproximado de nós (MDF) ou partículas (DEM) das malhas sintéticas
+SIZES = (100, 1_000, 10_000, 100_000, 1_000_000)
+
+# Tamanho máximo em que cada solver ou cálculo de forças é executado; acima dele o caso é pulado. A
+# matriz densa ocupa 8 nn² bytes e a banda 8 nn^1.5 bytes; Jacobi, SOR e o laço original crescem bem mais
+# rápido que os demais.
+MDF_LIMITS = {"dense": 5_000, "banded": 100_000, "jacobi": 10_000, "sor": 100_000}
+DEM_LIMITS = {"loop": 1_000, "vectorized": 100_000}
+
+
+def dem_cases():
+    # Combinações (cálculo das forças, backend): o cálculo "half" em cada backend disponível e os cálculos
+    # de referência, que só existem no caminho NumPy
+    return [("half", backend) for backend in available_backends()] + [("vectorized", "numpy"), ("loop", "numpy")]
+
+
+def measure(function, memory=True):
+    """Executa `function` e retorna o resultado, o tempo em segundos e o pico de memória em bytes.
+
+    O tempo é medido numa execução sem rastreamento. Com memory=True a função roda mais uma vez sob o
+    tracemalloc, que vê as alocações do Python e do NumPy neste processo (não as dos processos do backend
+    paralelo nem a memória compartilhada); sem ele o pico fica None.
+    """
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def _run_case(record, limit, function, memory):
+    # Preenche `record` com o tempo e a memória de `function`, ou com o motivo de não ter sido executada
+    if limit is not None and record["nodes"] > limit:
+        record.update(status="skipped", reason=f"acima do limite de {limit} nós")
+        return record
+    try:
+        _, record["time"], record["peak_memory"] = measure(function, memory)
+        record["status"] = "ok"
+    except Exception as error:
+        record.update(status="error", reason=f"{type(error).__name__}: {error}")
+    return record
+
+
+def benchmark_mdf(sizes=SIZES, solvers=SOLVERS, memory=True):
+    # Tempo e pico de memória de cada solver da placa em placas quadradas de tamanho crescente
+    results = []
+    for size in sizes:
+        side = max(int(round(np.sqrt(size))), 3)
+        connections, temperatures = build_plate(side, side)
+        for solver in solvers:
+            record = {"solver": solver, "nodes": side * side, "rows": side, "columns": side}
+            results.append(_run_case(record, MDF_LIMITS.get(solver), memory=memory,
+                                     function=lambda: solve_temperatures(connections, temperatures, solver, side,
+                                                                         side)))
+            _print_record("MDF", solver, record)
+    return results
+
+
+def benchmark_dem(sizes=SIZES, cases=None, steps=20, memory=True):
+    # Tempo e pico de memória de `steps` passos de Verlet para cada cálculo das forças e backend, em
+    # malhas quadradas de partículas de tamanho crescente
+    results = []
+    for size in sizes:
+        side = max(int(round(np.sqrt(size))), 2)
+        data = build_particle_grid(side, side)
+        coordinates = np.array(data["coordinates"], dtype=np.float64)
+        model = (coordinates[:, :1], coordinates[:, 1:], np.array(data["connect"], dtype=np.int64),
+                 np.array(data["forces"], dtype=np.float64).reshape(-1, 1),
+                 np.array(data["restrictions"]).reshape(-1, 1))
+        for force_kernel, backend in cases or dem_cases():
+            record = {"force_kernel": force_kernel, "backend": backend, "nodes": side * side, "steps": steps}
+            results.append(_run_case(record, DEM_LIMITS.get(force_kernel), memory=memory,
+                                     function=lambda: simulate_model(*model, force_kernel=force_kernel,
+                                                                     backend=backend, N=steps)))
+            if record["status"] == "ok":
+                record["time_per_step"] = record["time"] / steps
+            _print_record("DEM", f"{force_kernel}/{backend}", record)
+    return results
+
+
+def check_mdf_reference(input_file=os.path.join(MDF_DIR, "pvc2.json"),
+                        reference_file=os.path.join(MDF_DIR, "output_pvc.json"), solvers=SOLVERS, rtol=1e-6):
+    # Confere o campo de temperaturas de cada solver com a saída de referência. Os solvers iterativos param
+    # numa tolerância, então a diferença é medida em relação à maior temperatura da referência.
+    connections, temperatures, rows, columns = read_json(input_file)
+    with open(reference_file, "r") as f:
+        reference = np.array(json.load(f)["temperatures"])
+    scale = np.max(np.abs(reference))
+
+    checks = []
+    for solver in solvers:
+        field = to_plate_field(solve_temperatures(connections, temperatures, solver, rows, columns), connections,
+                               rows, columns)
+        # Um campo de forma diferente não é comparável e fica sem diferença (None no arquivo de resultados)
+        difference = None
+        if field.shape == reference.shape:
+            difference = float(np.max(np.abs(field - reference)) / scale)
+        checks.append({"solver": solver, "relative_difference": difference,
+                       "passed": difference is not None and difference <= rtol})
+        _print_check("MDF", solver, checks[-1])
+    return checks
+
+
+def check_dem_reference(input_file=os.path.join(DEM_DIR, "pvi2.json"),
+                        reference_file=os.path.join(DEM_DIR, "output_python.json"), cases=None, rtol=1e-6):
+    # Confere o deslocamento da partícula acompanhada de cada cálculo das forças e backend com a saída de
+    # referência. A ordem das somas muda entre eles, daí a tolerância relativa ao maior deslocamento.
+    with open(reference_file, "r") as f:
+        reference = np.array(json.load(f)["resultado"])
+    scale = np.max(np.abs(reference))
+
+    checks = []
+    for force_kernel, backend in cases or dem_cases():
+        result = simulate(input_file, force_kernel=force_kernel, backend=backend, N=len(reference)).ravel()
+        difference = float(np.max(np.abs(result - reference)) / scale)
+        checks.append({"force_kernel": force_kernel, "backend": backend, "relative_difference": difference,
+                       "passed": difference <= rtol})
+        _print_check("DEM", f"{force_kernel}/{backend}", checks[-1])
+    return checks
+
+
+def _print_record(suite, name, record):
+    if record["status"] != "ok":
+        print(f"{suite:>4} {name:>18} {record['nodes']:>9} {record['status']}: {record['reason']}")
+        return
+    memory = "-" if record["peak_memory"] is None else f"{record['peak_memory'] / 2 ** 20:.1f}"
+    print(f"{suite:>4} {name:>18} {record['nodes']:>9} {record['time']:>10.4f} s {memory:>10} MiB")
+
+
+def _print_check(suite, name, check):
+    difference = check["relative_difference"]
+    difference = "forma diferente" if difference is None else f"diferença relativa {difference:.2e}"
+    print(f"{suite:>4} {name:>18} {difference} {'ok' if check['passed'] else 'FALHOU'}")
+
+
+def machine_info():
+    # Identificação do ambiente, para que resultados de máquinas ou versões diferentes não sejam comparados
+    return {"platform": platform.platform(), "processor": platform.processor(), "cpu_count": os.cpu_count(),
+            "python": platform.python_version(), "numpy": np.__version__, "backends": available_backends()}
+
+
+def append_results(file_name, run):
+    # O arquivo acumula uma entrada por execução, para acompanhar a evolução dos tempos ao longo do tempo
+    runs = []
+    if os.path.exists(file_name):
+        with open(file_name, "r") as f:
+            runs = json.load(f)["runs"]
+    runs.append(run)
+    temporary = file_name + ".tmp"
+    with open(temporary, "w") as f:
+        json.dump({"runs": runs}, f, indent=1)
+    os.replace(temporary, file_name)
+
+
+def run_suite(sizes=SIZES, suites=("mdf", "dem"), steps=20, memory=True, references=True,
+              output_file="benchmark_results.json"):
+    """Executa os benchmarks e as verificações de referência e acrescenta os resultados em `output_file`.
+
+    Retorna a entrada gravada e se todas as verificações de referência passaram.
+    """
+    run = {"date": datetime.now(timezone.utc).isoformat(timespec="seconds"), "machine": machine_info(),
+           "sizes": list(sizes)}
+    if references:
+        run["references"] = {}
+        if "mdf" in suites:
+            run["references"]["mdf"] = check_mdf_reference()
+        if "dem" in suites:
+            run["references"]["dem"] = check_dem_reference()
+    if "mdf" in suites:
+        run["mdf"] = benchmark_mdf(sizes, memory=memory)
+    if "dem" in suites:
+        run["dem"] = benchmark_dem(sizes, steps=steps, memory=memory)
+
+    if output_file is not None:
+        append_results(output_file, run)
+    passed = all(check["passed"] for checks in run.get("references", {}).values() for check in checks)
+    return run, passed
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark e verificação de regressão dos solvers de MDF e DEM.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES),
+                        help="número aproximado de nós/partículas das malhas sintéticas")
+    parser.add_argument("--suite", choices=("all", "mdf", "dem"), default="all", help="solvers a medir")
+    parser.add_argument("--steps", type=int, default=20, help="passos de Verlet em cada medição do DEM")
+    parser.add_argument("--no-memory", action="store_true", help="não mede o pico de memória com o tracemalloc")
+    parser.add_argument("--no-references", action="store_true",
+                        help="não confere os resultados com output_pvc.json e output_python.json")
+    parser.add_argument("-o", "--output", default="benchmark_results.json",
+                        help="arquivo JSON ao qual os resultados desta execução são acrescentados")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    suites = ("mdf", "dem") if arguments.suite == "all" else (arguments.suite,)
+    _, passed = run_suite(arguments.sizes, suites, steps=arguments.steps, memory=not arguments.no_memory,
+                          references=not arguments.no_references, output_file=arguments.output)
+    sys.exit(0 if passed else 1)